@@ -0,0 +1,70 @@
+"""Compare memory held by a list of Block objects and the columnar CompactChain.
+
+Run from the repository root:
+
+    python benchmarks/bench_memory.py [votes ...]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import Block, CompactChain  # noqa: E402
+
+
+class DictBlock:
+    """Stand-in for the original __dict__-backed Block"""
+
+    def __init__(self, block):
+        self.index = block.index
+        self.timestamp = block.timestamp
+        self.vote_data = block.vote_data
+        self.previous_hash = block.previous_hash
+        self.nonce = block.nonce
+        self.hash = block.hash
+
+
+def synthetic_blocks(votes):
+    previous_hash = '0' * 64
+    for i in range(1, votes + 1):
+        vote = {'voter_id': f'voter-{i:09d}', 'vote': i % 3, 'timestamp': 1700000000.0 + i}
+        block = Block(i, 1700000000.0 + i, vote, previous_hash)
+        previous_hash = block.hash
+        yield block
+
+
+def measure(build, votes):
+    gc.collect()
+    tracemalloc.start()
+    store = build(synthetic_blocks(votes))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return current
+
+
+def build_compact(blocks):
+    chain = CompactChain()
+    chain.append(Block(0, 1700000000.0, {'message': 'Genesis Block'}, '0'))
+    for block in blocks:
+        chain.append(block)
+    return chain
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    builders = [
+        ('dict Block list', lambda blocks: [DictBlock(block) for block in blocks]),
+        ('slots Block list', list),
+        ('CompactChain', build_compact),
+    ]
+    print(f"{'votes':>10}" + ''.join(f"{name:>20}" for name, _ in builders))
+    for votes in sizes:
+        row = [measure(build, votes) for _, build in builders]
+        print(f"{votes:>10,}" + ''.join(f"{used / votes:>13,.0f} B/vote" for used in row))
+
+
+if __name__ == '__main__':
+    main()
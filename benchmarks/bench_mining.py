@@ -0,0 +1,71 @@
+"""Compare proof-of-work hash rates: per-nonce calculate_hash, midstate and process-pool mining.
+
+Run from the repository root:
+
+    python benchmarks/bench_mining.py [workers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')  # Skip block_mined records
+
+from blockchain import Block, SerialMiner, ProcessPoolMiner  # noqa: E402
+
+# Expected attempts grow 16x per difficulty level, so mine fewer blocks as it rises
+BLOCKS_PER_DIFFICULTY = {1: 400, 2: 100, 3: 20, 4: 4, 5: 1}
+
+
+def make_block(i):
+    vote = {'voter_id': f'voter-{i:08d}', 'vote': 0, 'timestamp': time.time()}
+    return Block(i + 1, time.time(), vote, previous_hash='0' * 64)
+
+
+def legacy_mine(block, difficulty):
+    """The original loop: rebuild the header string and re-hash it on every nonce"""
+    target = '0' * difficulty
+    while block.hash[:difficulty] != target:
+        block.nonce += 1
+        block.hash = block.calculate_hash()
+    return block.hash
+
+
+def miner_mine(miner):
+    def mine(block, difficulty):
+        mined = block.mine_block(difficulty, miner)
+        assert mined == block.calculate_hash(), "mined hash diverged from calculate_hash"
+        return mined
+    return mine
+
+
+def hashes_per_second(mine, difficulty):
+    attempts = 0
+    start = time.perf_counter()
+    for i in range(BLOCKS_PER_DIFFICULTY[difficulty]):
+        block = make_block(i)
+        mine(block, difficulty)
+        attempts += block.nonce + 1
+    elapsed = time.perf_counter() - start
+    return attempts / elapsed
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    pool_miner = ProcessPoolMiner(workers)
+    columns = [
+        ('legacy', legacy_mine),
+        ('midstate', miner_mine(SerialMiner())),
+        (f'pool x{workers}', miner_mine(pool_miner)),
+    ]
+    print(f"{'difficulty':>10}" + ''.join(f"{name + ' H/s':>18}" for name, _ in columns))
+    try:
+        for difficulty in range(1, 6):
+            rates = [hashes_per_second(mine, difficulty) for _, mine in columns]
+            print(f"{difficulty:>10}" + ''.join(f"{rate:>18,.0f}" for rate in rates))
+    finally:
+        pool_miner.close()
+
+
+if __name__ == '__main__':
+    main()
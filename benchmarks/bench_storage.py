@@ -0,0 +1,60 @@
+"""Measure ChainStore append throughput and startup (snapshot + tail replay) time.
+
+Run from the repository root:
+
+    python benchmarks/bench_storage.py [blocks] [data_dir]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import Block, Blockchain, ChainStore  # noqa: E402
+
+
+def build_chain(directory, blocks):
+    """Append synthetic single-vote blocks; hashes are computed but not mined"""
+    chain = Blockchain(storage=ChainStore(directory))
+    start = time.perf_counter()
+    with chain.lock:
+        for i in range(1, blocks):
+            vote = {'voter_id': f'voter-{i:09d}', 'vote': i % 3, 'timestamp': 1700000000 + i}
+            chain.append_block(Block(i, 1700000000 + i, vote, chain.get_latest_block().hash))
+    chain.storage.close()
+    return time.perf_counter() - start
+
+
+def time_startup(directory):
+    start = time.perf_counter()
+    chain = Blockchain(storage=ChainStore(directory))
+    elapsed = time.perf_counter() - start
+    length = len(chain.chain)
+    chain.storage.close()
+    return elapsed, length
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.mkdtemp(prefix='chainstore-')
+    try:
+        write_time = build_chain(directory, blocks)
+        print(f"append: {blocks:,} blocks in {write_time:.2f}s ({blocks / write_time:,.0f} blocks/s)")
+
+        elapsed, length = time_startup(directory)
+        print(f"startup with snapshot: {elapsed:.3f}s for {length:,} blocks")
+
+        for name in os.listdir(directory):
+            if name.startswith('snapshot-'):
+                os.remove(os.path.join(directory, name))
+        elapsed, length = time_startup(directory)
+        print(f"startup with full replay: {elapsed:.3f}s for {length:,} blocks")
+    finally:
+        if len(sys.argv) <= 2:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Benchmark suite: vote ingestion, page latency, verification and memory at growing chain sizes.
+
+Run from the repository root:
+
+    python benchmarks/bench_suite.py --sizes 1000,10000,100000 --output bench.json
+    python benchmarks/bench_suite.py --baseline bench.json
+
+Each size runs in a fresh process, so peak RSS belongs to that chain alone. Per size it records:
+
+    votes_per_second      Blockchain.add_vote building the chain, one block per vote unless --batch
+    results_ms_p50/p95    /results through the Flask test client, page cache disabled
+    results_cached_ms_p50 /results served from the page cache
+    chain_ms_p50/p95      /chain?limit=50, page cache disabled
+    verify_seconds        Blockchain.is_chain_valid over the whole chain
+    peak_rss_mb           maximum resident set size of the process
+
+Voter IDs and vote order are fixed, so runs differ only in timestamps and hence nonces.
+With --baseline, every metric listed in benchmarks/thresholds.json is compared with the
+same size in the baseline file and the run exits with status 1 on any regression.
+"""
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THRESHOLDS = os.path.join(ROOT, 'benchmarks', 'thresholds.json')
+# Settings that would make the imported app persist to disk or gossip with peers
+ISOLATED_ENV = ('CHAIN_DATA_DIR', 'NODE_ADDRESS', 'BULK_UPLOAD_TOKEN', 'NODE_SYNC_TOKEN')
+
+
+def request_times(client, url, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    samples.sort()
+    return statistics.median(samples), samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+
+
+def measure(votes, batch, requests_per_route):
+    """Build one chain and measure it; runs inside the worker process"""
+    sys.path.insert(0, ROOT)
+    import blockchain
+
+    chain = blockchain.Blockchain()
+    chain.seal_in_background = False
+    chain.batch_size = batch
+    start = time.perf_counter()
+    for i in range(votes):
+        chain.add_vote({'voter_id': f'bench-{i:09d}', 'vote': i % 3, 'timestamp': time.time()})
+    chain.flush_pending()
+    build_seconds = time.perf_counter() - start
+    assert chain.get_total_votes() == votes, chain.get_vote_counts()
+
+    blockchain.voting_chain = chain  # Routes read the module global
+    client = blockchain.app.test_client()
+    max_entries = blockchain.page_cache.max_entries
+    blockchain.page_cache.max_entries = 0  # Every request renders; put() evicts straight away
+    results_p50, results_p95 = request_times(client, '/results', requests_per_route)
+    chain_p50, chain_p95 = request_times(client, '/chain?limit=50', requests_per_route)
+    blockchain.page_cache.max_entries = max_entries
+    results_cached_p50, _ = request_times(client, '/results', requests_per_route)
+
+    start = time.perf_counter()
+    assert chain.is_chain_valid()
+    verify_seconds = time.perf_counter() - start
+
+    return {
+        'votes': votes,
+        'blocks': len(chain.chain),
+        'build_seconds': round(build_seconds, 4),
+        'votes_per_second': round(votes / build_seconds, 1),
+        'results_ms_p50': round(results_p50, 3),
+        'results_ms_p95': round(results_p95, 3),
+        'results_cached_ms_p50': round(results_cached_p50, 3),
+        'chain_ms_p50': round(chain_p50, 3),
+        'chain_ms_p95': round(chain_p95, 3),
+        'verify_seconds': round(verify_seconds, 4),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),  # KiB on Linux
+    }
+
+
+def run_size(votes, batch, requests_per_route):
+    env = {key: value for key, value in os.environ.items() if key not in ISOLATED_ENV}
+    env.update(LOG_LEVEL='WARNING', SEAL_IN_BACKGROUND='0')
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', str(votes),
+         '--batch', str(batch), '--requests', str(requests_per_route)],
+        cwd=ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode:
+        raise click.ClickException(f'{votes} votes failed:\n{completed.stderr}')
+    return json.loads(completed.stdout)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(report, baseline, thresholds):
+    """(size, metric, baseline, current, limit) for every metric outside its threshold"""
+    found = []
+    for size, current in report['results'].items():
+        previous = baseline['results'].get(size)
+        if previous is None:
+            continue
+        for metric, rule in thresholds.items():
+            if metric not in current or metric not in previous:
+                continue
+            slack = rule.get('slack', 0)
+            if rule['better'] == 'lower':
+                limit = previous[metric] * (1 + rule['tolerance']) + slack
+                failed = current[metric] > limit
+            else:
+                limit = previous[metric] * (1 - rule['tolerance']) - slack
+                failed = current[metric] < limit
+            if failed:
+                found.append((size, metric, previous[metric], current[metric], limit))
+    return found
+
+
+@click.command()
+@click.option('--sizes', default='1000,10000,100000', show_default=True,
+              help='Comma-separated vote counts; 1000000 takes a few minutes.')
+@click.option('--batch', default=1, show_default=True, help='Votes per block while building the chain.')
+@click.option('--requests', 'requests_per_route', default=50, show_default=True, help='Requests timed per route.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the JSON report here instead of stdout.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Earlier report to check for regressions.')
+@click.option('--thresholds', default=THRESHOLDS, show_default=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--worker', type=int, hidden=True)
+def main(sizes, batch, requests_per_route, output, baseline, thresholds, worker):
+    if worker is not None:
+        click.echo(json.dumps(measure(worker, batch, requests_per_route)))
+        return
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': {'batch': batch, 'requests_per_route': requests_per_route},
+        'results': {},
+    }
+    for votes in (int(size) for size in sizes.split(',')):
+        result = run_size(votes, batch, requests_per_route)
+        report['results'][str(votes)] = result
+        click.echo(f"{votes:>9,} votes: {result['votes_per_second']:>9,.0f} votes/s  "
+                   f"/results {result['results_ms_p50']:.2f} ms  /chain {result['chain_ms_p50']:.2f} ms  "
+                   f"verify {result['verify_seconds']:.2f}s  rss {result['peak_rss_mb']:,.0f} MB", err=True)
+
+    if output:
+        with open(output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        click.echo(json.dumps(report, indent=2))
+
+    if baseline:
+        with open(baseline) as handle:
+            previous = json.load(handle)
+        with open(thresholds) as handle:
+            rules = json.load(handle)
+        if previous.get('config') != report['config']:
+            click.echo(f"warning: baseline config {previous.get('config')} differs from {report['config']}", err=True)
+        found = regressions(report, previous, rules)
+        for size, metric, before, after, limit in found:
+            click.echo(f'REGRESSION {size} votes {metric}: {before} -> {after} (limit {limit:.3f})', err=True)
+        if found:
+            sys.exit(1)
+        click.echo(f'no regressions against {baseline}', err=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Time each HTML route with the cached page templates against compiling the template on every request.
+
+Run from the repository root:
+
+    python benchmarks/bench_templates.py [requests per route]
+
+"compiled per request" turns off Jinja's template cache, which is what render_template_string
+did for every page view before the pages were registered with a template loader.
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SEAL_IN_BACKGROUND', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')  # Skip block_mined records
+
+from blockchain import app, voting_chain  # noqa: E402
+
+ROUTES = [
+    ('home', '/', False),
+    ('results', '/results', False),
+    ('chain (20 blocks)', '/chain?limit=20', False),
+    ('candidates login', '/candidates', False),
+    ('candidates', '/candidates', True),
+    ('analysis', '/analysis', False),
+    ('admin settings', '/admin/settings', False),
+    ('404', '/no-such-page', False),
+]
+
+
+def time_route(client, url, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.get(url).get_data()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for i in range(20):
+        voting_chain.add_vote({'voter_id': f'bench-{i}', 'vote': i % 3, 'timestamp': time.time()})
+    guest = app.test_client()
+    admin = app.test_client()
+    admin.post('/candidates', data={'admin_login': '1', 'username': 'admin', 'password': '1234'})
+
+    cache = app.jinja_env.cache
+    print(f'median of {count} requests per route')
+    print(f"{'route':<20}{'compiled per request':>22}{'cached':>10}{'speedup':>10}")
+    for name, url, logged_in in ROUTES:
+        client = admin if logged_in else guest
+        app.jinja_env.cache = None
+        uncached = time_route(client, url, count)
+        app.jinja_env.cache = cache
+        cached = time_route(client, url, count)
+        print(f'{name:<20}{uncached * 1000:>19.2f} ms{cached * 1000:>7.2f} ms{uncached / cached:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
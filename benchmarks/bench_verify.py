@@ -0,0 +1,50 @@
+"""Measure full-chain verification time, serial vs. the parallel verifier at 1..N workers.
+
+Run from the repository root:
+
+    python benchmarks/bench_verify.py [blocks] [max_workers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')  # Skip block_mined records
+
+from blockchain import Block, Blockchain, verify_chain_parallel  # noqa: E402
+
+
+def build_chain(blocks):
+    """Synthetic single-vote blocks linked by hash, mined at the chain's minimum difficulty"""
+    chain = Blockchain()
+    with chain.lock:
+        for i in range(1, blocks):
+            vote = {'voter_id': f'voter-{i:09d}', 'vote': i % 3, 'timestamp': 1700000000.0 + i}
+            block = Block(i, 1700000000.0 + i, vote, chain.get_latest_block().hash)
+            block.hash = chain.mine(block)
+            chain.append_block(block)
+    return chain
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    chain = build_chain(blocks)
+
+    start = time.perf_counter()
+    assert chain.find_invalid_block() is None
+    serial = time.perf_counter() - start
+    print(f"{'workers':>8} {'seconds':>10} {'blocks/s':>12} {'speedup':>8}")
+    print(f"{'serial':>8} {serial:>10.2f} {blocks / serial:>12,.0f} {1:>7.2f}x")
+
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        assert verify_chain_parallel(chain.chain, workers, difficulty=chain.min_difficulty) is None
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8} {elapsed:>10.2f} {blocks / elapsed:>12,.0f} {serial / elapsed:>7.2f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Compare a set of voter IDs with VoterRegistry: memory, lookups, save/open, and that they agree.
+
+Run from the repository root:
+
+    python benchmarks/bench_voters.py [voters ...]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blockchain import VoterRegistry  # noqa: E402
+
+LOOKUPS = 200000
+
+
+def voter_ids(count, prefix='voter'):
+    return (f'{prefix}-{i:010d}' for i in range(count))
+
+
+def timed(build):
+    start = time.perf_counter()
+    store = build()
+    return store, time.perf_counter() - start
+
+
+def set_bytes(voter_set):
+    return sys.getsizeof(voter_set) + sum(sys.getsizeof(voter_id) for voter_id in voter_set)
+
+
+def registry_bytes(registry):
+    _, _, starts, count = registry.base
+    bloom = sum(words.itemsize * len(words) for words, _, _ in registry.layers)
+    recent = sum(sys.getsizeof(keys) + sum(sys.getsizeof(key) for key in keys)
+                 for keys in (registry.recent, registry.merging))
+    return count * registry.KEY_BYTES + starts.itemsize * len(starts) + bloom + recent
+
+
+def lookups_per_second(store, ids):
+    start = time.perf_counter()
+    for voter_id in ids:
+        voter_id in store
+    return len(ids) / (time.perf_counter() - start)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000]
+    print(f"{'voters':>10}{'store':>10}{'B/voter':>10}{'build s':>10}{'hit/s':>12}{'miss/s':>12}")
+    for count in sizes:
+        present = [f'voter-{i:010d}' for i in range(0, count, max(count // LOOKUPS, 1))]
+        absent = list(voter_ids(len(present), prefix='new'))
+        voter_set, set_time = timed(lambda: set(voter_ids(count)))
+        registry, registry_time = timed(lambda: VoterRegistry(voter_ids(count)))
+
+        for name, store, used, elapsed in (('set', voter_set, set_bytes(voter_set), set_time),
+                                           ('registry', registry, registry_bytes(registry), registry_time)):
+            print(f'{count:>10,}{name:>10}{used / count:>10,.1f}{elapsed:>10.2f}'
+                  f'{lookups_per_second(store, present):>12,.0f}{lookups_per_second(store, absent):>12,.0f}')
+
+        assert len(registry) == len(voter_set)
+        assert all((voter_id in registry) == (voter_id in voter_set) for voter_id in present + absent)
+
+        directory = tempfile.mkdtemp(prefix='voters-')
+        try:
+            path = os.path.join(directory, 'voters.idx')
+            start = time.perf_counter()
+            registry.save(path)
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            mapped = VoterRegistry.open(path)
+            opened = time.perf_counter() - start
+            assert all((voter_id in mapped) == (voter_id in voter_set) for voter_id in present + absent)
+            print(f'{"":>10}save {saved:.2f}s, open (mmap) {opened * 1000:.1f} ms, '
+                  f'file {os.path.getsize(path) / count:.1f} B/voter, answers match the set')
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,143 +1,2497 @@
-from flask import Flask, render_template, request, redirect, url_for, render_template_string, jsonify, flash, session
+from flask import Flask, render_template, request, redirect, url_for, stream_template, stream_with_context, jsonify, flash, session, abort
+from jinja2 import DictLoader
+from werkzeug.http import is_resource_modified
 import hashlib
+import hmac
 import time
+import asyncio
+import io
+import sys
 import json
 import os
 import datetime
 import threading
+import logging
+import logging.handlers
+import queue
 import random
+import multiprocessing
+import array
+import mmap
+import pickle
+import struct
+import zlib
+import atexit
+import itertools
+import csv
+import bisect
+import contextlib
+import copy
+import functools
+import re
+import click
 import requests  # Add this import for consensus of nodes
+import gzip
+from urllib.parse import urlparse
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------
+# Metrics
+# -------------------------
+
+class Histogram:
+    """Fixed-bucket histogram, exported in Prometheus text format.
+    
+    Each label combination also keeps a bounded window of its most recent samples, so /analysis can
+    show exact recent percentiles while memory stays fixed however long the node runs.
+    """
+    
+    WINDOW = 2048
+    
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self.series = {}  # Label values -> [bucket counts, sum, count, recent samples]
+        self.lock = threading.Lock()
+    
+    def observe(self, value, labels=()):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0, deque(maxlen=self.WINDOW)]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+            series[3].append(value)
+    
+    def percentiles(self, labels=(), quantiles=(0.5, 0.95, 0.99)):
+        """Percentiles of the recent samples for one label combination, or None before any sample"""
+        with self.lock:
+            series = self.series.get(labels)
+            samples = sorted(series[3]) if series else []
+        if not samples:
+            return None
+        return [samples[min(int(len(samples) * q), len(samples) - 1)] for q in quantiles]
+    
+    def counts(self):
+        """Samples observed so far per label combination"""
+        with self.lock:
+            return {labels: series[2] for labels, series in self.series.items()}
+    
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = sorted((labels, counts[:], total, count) for labels, (counts, total, count, _) in self.series.items())
+        for labels, counts, total, count in series:
+            label_text = ','.join(f'{name}="{value}"' for name, value in zip(self.labelnames, labels))
+            prefix = label_text + ',' if label_text else ''
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            suffix = f'{{{label_text}}}' if label_text else ''
+            lines.append(f'{self.name}_sum{suffix} {total:.9g}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return '\n'.join(lines)
+
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+MINING_SECONDS = Histogram('voting_mining_seconds', 'Wall time of each proof-of-work search', SECONDS_BUCKETS)
+NONCE_ATTEMPTS = Histogram('voting_mining_nonce_attempts', 'Nonces hashed per mined block',
+                           [4 ** power for power in range(13)])
+HASH_RATE = Histogram('voting_mining_hashes_per_second', 'Hash rate of each proof-of-work search',
+                      (1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7))
+LOCK_WAIT = Histogram('voting_lock_wait_seconds', 'Time spent waiting to acquire the chain or mining lock',
+                      (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5), ('lock', 'operation'))
+REQUEST_SECONDS = Histogram('voting_request_seconds', 'HTTP request latency until the response starts',
+                            SECONDS_BUCKETS, ('route', 'method'))
+METRICS = [MINING_SECONDS, NONCE_ATTEMPTS, HASH_RATE, LOCK_WAIT, REQUEST_SECONDS]
+
+@contextlib.contextmanager
+def timed_lock(lock, lock_name, operation):
+    """Acquire `lock`, recording how long that took in LOCK_WAIT"""
+    start = time.perf_counter()
+    with lock:
+        LOCK_WAIT.observe(time.perf_counter() - start, (lock_name, operation))
+        yield
+
+# -------------------------
+# Logging
+# -------------------------
+
+logger = logging.getLogger('voting')
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Hot-path events (one per vote or block) are written for their first occurrence and then one in every N
+LOG_SAMPLE_EVERY = max(int(os.environ.get("LOG_SAMPLE_EVERY", 100)), 1)
+LOG_QUEUE_SIZE = 10000
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event name and the record's structured fields"""
+    
+    def format(self, record):
+        entry = {'ts': round(record.created, 6), 'level': record.levelname, 'logger': record.name,
+                 'event': record.getMessage()}
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread without blocking; if the queue is full the record is dropped"""
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record):
+        # Same process, so the record can travel as-is once its message is merged with its args
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+log_handler = None
+_sample_counters = {}
+
+def configure_logging(stream=None):
+    """Send log records through a bounded queue to a thread that writes them as JSON lines.
+    
+    Request threads only pay for an enqueue. Leaves logging alone if the host (a server or test
+    runner) has already configured the root logger.
+    """
+    global log_handler
+    logger.setLevel(LOG_LEVEL)
+    if logging.root.handlers:
+        return
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(JsonFormatter())
+    log_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    listener = logging.handlers.QueueListener(log_handler.queue, writer, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Registered before shutdown_chain, so it runs after it and drains its records
+    logging.root.addHandler(log_handler)
+
+def log_event(level, event, **fields):
+    """Write a structured record: `event` is a short snake_case name, `fields` become JSON keys"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+def log_sampled(level, event, **fields):
+    """log_event for hot-path events: writes the first and then every LOG_SAMPLE_EVERY-th occurrence.
+    
+    Each written record carries `seen` (occurrences so far) and `sample_every`, so counts can be scaled back up.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    counter = _sample_counters.get(event) or _sample_counters.setdefault(event, itertools.count(1))
+    seen = next(counter)  # next() on itertools.count is atomic, so concurrent callers never share a number
+    if (seen - 1) % LOG_SAMPLE_EVERY == 0:
+        logger.log(level, event, extra={'fields': dict(fields, seen=seen, sample_every=LOG_SAMPLE_EVERY)})
+
+# -------------------------
+# Merkle Tree Helpers
+# -------------------------
+
+def vote_receipt(vote):
+    """Leaf hash of a vote; handed to the voter as their receipt"""
+    return hashlib.sha256(json.dumps(vote, sort_keys=True).encode()).hexdigest()
+
+def voter_digest(voter_id):
+    """Hashed voter ID used as the key of the voter -> block index"""
+    return hashlib.sha256(str(voter_id).encode()).hexdigest()
+
+def _merkle_parent(left, right):
+    return hashlib.sha256((left + right).encode()).hexdigest()
+
+def merkle_root(leaves):
+    """Root over leaf hashes, duplicating the last node on odd levels.
+    
+    The root alone doesn't fix the leaf count ([a, b, c] and [a, b, c, c] share one), so block
+    headers commit to the count as well.
+    """
+    if not leaves:
+        return hashlib.sha256(b'').hexdigest()
+    level = list(leaves)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [_merkle_parent(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+    return level[0]
+
+def merkle_proof(leaves, position):
+    """Sibling path from leaf to root: a list of {'hash', 'side'} steps"""
+    path = []
+    level = list(leaves)
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        sibling = position ^ 1
+        path.append({'hash': level[sibling], 'side': 'left' if sibling < position else 'right'})
+        level = [_merkle_parent(level[i], level[i + 1]) for i in range(0, len(level), 2)]
+        position //= 2
+    return path
+
+def verify_merkle_proof(leaf, path, root):
+    current = leaf
+    for step in path:
+        if step['side'] == 'left':
+            current = _merkle_parent(step['hash'], current)
+        else:
+            current = _merkle_parent(current, step['hash'])
+    return current == root
 
 # -------------------------
 # Enhanced Blockchain Core Classes
 # -------------------------
 
 class Block:
+    __slots__ = ('index', 'timestamp', 'vote_data', 'previous_hash', 'merkle_root', 'nonce', 'hash')
+    
     def __init__(self, index, timestamp, vote_data, previous_hash=''):
         self.index = index
         self.timestamp = timestamp
         self.vote_data = vote_data
         self.previous_hash = previous_hash
+        # Multi-vote blocks commit to a Merkle root so the header stays fixed-size
+        self.merkle_root = self.compute_merkle_root() if self.is_batch() else None
         self.nonce = 0
         self.hash = self.calculate_hash()
     
+    def is_batch(self):
+        return isinstance(self.vote_data, dict) and 'votes' in self.vote_data
+    
+    def compute_merkle_root(self):
+        return merkle_root([vote_receipt(vote) for vote in self.vote_data['votes']])
+    
+    def header_prefix(self):
+        """Serialized header fields that stay fixed while mining (everything but the nonce)"""
+        if self.is_batch():
+            # The leaf count pins the tree shape: a root alone also matches a batch with its tail repeated
+            payload = f"{len(self.vote_data['votes'])}:{self.merkle_root}"
+        else:
+            payload = json.dumps(self.vote_data)
+        return f"{self.index}{self.timestamp}{payload}{self.previous_hash}".encode()
+    
     def calculate_hash(self):
-        block_string = f"{self.index}{self.timestamp}{json.dumps(self.vote_data)}{self.previous_hash}{self.nonce}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        return hashlib.sha256(self.header_prefix() + str(self.nonce).encode()).hexdigest()
+    
+    def to_dict(self):
+        return {
+            'index': self.index,
+            'timestamp': self.timestamp,
+            'vote_data': self.vote_data,
+            'previous_hash': self.previous_hash,
+            'merkle_root': self.merkle_root,
+            'nonce': self.nonce,
+            'hash': self.hash
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a stored block as-is, without recomputing its hash or Merkle root"""
+        block = cls.__new__(cls)
+        block.index = data['index']
+        block.timestamp = data['timestamp']
+        block.vote_data = data['vote_data']
+        block.previous_hash = data['previous_hash']
+        block.merkle_root = data.get('merkle_root')
+        block.nonce = data['nonce']
+        block.hash = data['hash']
+        return block
+    
+    def mine_block(self, difficulty, miner=None):
+        # Serial mining is the default; Blockchain passes a pool miner for higher difficulties
+        miner = miner or SerialMiner()
+        start = time.perf_counter()
+        self.nonce, self.hash = miner.mine(self.header_prefix(), difficulty, self.nonce)
+        elapsed = time.perf_counter() - start
+        MINING_SECONDS.observe(elapsed)
+        NONCE_ATTEMPTS.observe(miner.last_attempts)
+        HASH_RATE.observe(miner.last_hashrate)
+        log_sampled(logging.INFO, 'block_mined', index=self.index, hash=self.hash, nonce=self.nonce,
+                    difficulty=difficulty, attempts=miner.last_attempts, seconds=round(elapsed, 6),
+                    hashrate=round(miner.last_hashrate))
+        return self.hash
+
+# -------------------------
+# Proof-of-Work Miners
+# -------------------------
+
+class MiningTimeout(Exception):
+    """Raised when no valid nonce is found within the miner's time budget"""
+
+def _hash_nonce(midstate, nonce):
+    hasher = midstate.copy()
+    hasher.update(str(nonce).encode())
+    return hasher.hexdigest()
+
+class SerialMiner:
+    """Single-threaded nonce search from a precomputed header midstate"""
+    
+    def __init__(self, time_budget=None):
+        self.time_budget = time_budget  # Optional wall-clock limit in seconds
+        self.last_hashrate = 0.0
+        self.last_attempts = 0
     
-    def mine_block(self, difficulty):
-        # Fast mining for voting
+    def mine(self, prefix, difficulty, start_nonce=0):
         target = '0' * difficulty
-        max_iterations = 1000  # Reduced for faster mining
-        iterations = 0
+        deadline = time.time() + self.time_budget if self.time_budget else None
+        start = time.perf_counter()
         
-        while self.hash[:difficulty] != target and iterations < max_iterations:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
-            iterations += 1
+        # Hash the static header once and only feed the nonce per attempt
+        midstate = hashlib.sha256(prefix)
+        nonce = start_nonce
+        block_hash = _hash_nonce(midstate, nonce)
+        while not block_hash.startswith(target):
+            nonce += 1
+            block_hash = _hash_nonce(midstate, nonce)
+            if deadline and nonce % 4096 == 0 and time.time() > deadline:
+                raise MiningTimeout(f"No nonce found for difficulty {difficulty} within {self.time_budget}s")
+        
+        self.last_attempts = nonce - start_nonce + 1
+        self.last_hashrate = self.last_attempts / max(time.perf_counter() - start, 1e-9)
+        return nonce, block_hash
+
+# Per-process stop flag shared by pool workers, installed by _init_pow_worker
+_pow_stop = None
+
+def _init_pow_worker(stop_event):
+    global _pow_stop
+    _pow_stop = stop_event
+
+def _pow_search(prefix, difficulty, first_nonce, step, deadline):
+    """Worker: scan first_nonce, first_nonce + step, ... until found, stopped or out of time"""
+    target = '0' * difficulty
+    midstate = hashlib.sha256(prefix)
+    nonce = first_nonce
+    attempts = 0
+    while not _pow_stop.is_set():
+        for _ in range(1024):
+            block_hash = _hash_nonce(midstate, nonce)
+            attempts += 1
+            if block_hash.startswith(target):
+                _pow_stop.set()
+                return nonce, block_hash, attempts
+            nonce += step
+        if deadline and time.time() > deadline:
+            break
+    return None, None, attempts
+
+class ProcessPoolMiner:
+    """Splits the nonce space across a process pool; the first worker to find a nonce stops the rest"""
+    
+    def __init__(self, workers=None, time_budget=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.time_budget = time_budget
+        self.last_hashrate = 0.0
+        self.last_attempts = 0
+        self.pool = None
+        self.stop_event = None
+        self.lock = threading.Lock()  # One search at a time per pool
+    
+    def _get_pool(self):
+        if self.pool is None:
+            self.stop_event = multiprocessing.Event()
+            self.pool = multiprocessing.Pool(self.workers, initializer=_init_pow_worker,
+                                             initargs=(self.stop_event,))
+        return self.pool
+    
+    def mine(self, prefix, difficulty, start_nonce=0):
+        with self.lock:
+            pool = self._get_pool()
+            self.stop_event.clear()
+            deadline = time.time() + self.time_budget if self.time_budget else None
+            start = time.perf_counter()
+            
+            # Interleave nonces: worker k tries start + k, start + k + workers, ...
+            jobs = [pool.apply_async(_pow_search, (prefix, difficulty, start_nonce + k, self.workers, deadline))
+                    for k in range(self.workers)]
+            results = [job.get() for job in jobs]
             
-        if iterations >= max_iterations:
-            # If we hit max iterations, just accept the current hash
-            print(f"Block mining stopped after {iterations} iterations")
+            self.last_attempts = sum(r[2] for r in results)
+            self.last_hashrate = self.last_attempts / max(time.perf_counter() - start, 1e-9)
+            found = [r for r in results if r[0] is not None]
+            if not found:
+                raise MiningTimeout(f"No nonce found for difficulty {difficulty} within {self.time_budget}s")
+            nonce, block_hash, _ = min(found)
+            return nonce, block_hash
+    
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+# -------------------------
+# Durable Chain Storage
+# -------------------------
+
+class ChainStore:
+    """Append-only log of sealed blocks with periodic index snapshots.
+    
+    Blocks are written as length-prefixed, CRC32-checksummed JSON records to
+    numbered segment files. Appends are fsynced in batches (every fsync_every
+    blocks or fsync_interval seconds), so a crash can lose at most that window.
+    Votes waiting for a block go to a pending journal under the same fsync policy; sealed votes
+    stay in it until it reaches PENDING_COMPACT_AT records (restoring skips voters already on the chain).
+    Snapshots pickle the chain's indexes and record offsets every
+    snapshot_every blocks, so startup only replays the log tail.
+    """
+    
+    RECORD_HEADER = struct.Struct('>II')  # payload length, crc32
+    PENDING_COMPACT_AT = 4096  # Pending journal records (sealed votes included) before it is rewritten
+    
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, fsync_every=64,
+                 fsync_interval=1.0, snapshot_every=10000):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.segment_ids = array.array('I')  # Per block: segment number
+        self.offsets = array.array('Q')  # Per block: record offset within the segment
+        self.maps = {}  # Sealed segment number -> mmap
+        self.active_id = 0
+        self.active_file = None
+        self.active_size = 0
+        self.unsynced = 0
+        self.last_sync = time.time()
+        self.pending_file = None
+        self.pending_count = 0  # Votes in the pending journal
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        os.makedirs(directory, exist_ok=True)
+    
+    def _segment_path(self, segment_id):
+        return os.path.join(self.directory, f'segment-{segment_id:06d}.log')
+    
+    def _segment_ids_on_disk(self):
+        names = [name for name in os.listdir(self.directory) if name.startswith('segment-') and name.endswith('.log')]
+        return sorted(int(name[8:14]) for name in names)
+    
+    def _snapshot_paths(self):
+        names = [name for name in os.listdir(self.directory) if name.startswith('snapshot-') and name.endswith('.pkl')]
+        return [os.path.join(self.directory, name) for name in sorted(names, reverse=True)]
+    
+    def _scan_segment(self, segment_id, data, start):
+        """Index records from start onwards; returns the end offset of the last intact record"""
+        offset = start
+        header_size = self.RECORD_HEADER.size
+        while offset + header_size <= len(data):
+            length, checksum = self.RECORD_HEADER.unpack_from(data, offset)
+            end = offset + header_size + length
+            if end > len(data) or zlib.crc32(data[offset + header_size:end]) != checksum:
+                break  # Torn or corrupt tail from a crash: everything after is discarded
+            self.segment_ids.append(segment_id)
+            self.offsets.append(offset)
+            offset = end
+        return offset
+    
+    def _read_snapshot(self):
+        for path in self._snapshot_paths():
+            try:
+                with open(path, 'rb') as f:
+                    checksum = struct.unpack('>I', f.read(4))[0]
+                    payload = f.read()
+                if zlib.crc32(payload) == checksum:
+                    state = pickle.loads(payload)
+                    if isinstance(state.get('voters'), str):
+                        state['voters'] = VoterRegistry.open(os.path.join(self.directory, state['voters']))
+                    return state
+            except (OSError, ValueError, struct.error, pickle.UnpicklingError, AttributeError) as error:
+                log_event(logging.WARNING, 'snapshot_unreadable', path=path, error=repr(error))
+        return None
+    
+    def load(self):
+        """Map the segments and return (StoredChain, snapshot state or None)"""
+        snapshot = self._read_snapshot()
+        resume_segment, resume_offset = 0, 0
+        if snapshot is not None:
+            self.segment_ids = snapshot.pop('segment_ids')
+            self.offsets = snapshot.pop('offsets')
+            resume_segment, resume_offset = snapshot.pop('log_position')
+        
+        segment_ids = self._segment_ids_on_disk()
+        for segment_id in segment_ids:
+            path = self._segment_path(segment_id)
+            size = os.path.getsize(path)
+            if size == 0:
+                continue
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if segment_id >= resume_segment:
+                # Only records written after the snapshot need scanning
+                start = resume_offset if segment_id == resume_segment else 0
+                end = self._scan_segment(segment_id, data, start)
+                if end < size:
+                    data.close()
+                    with open(path, 'r+b') as f:
+                        f.truncate(end)
+                    if end == 0:
+                        continue
+                    with open(path, 'rb') as f:
+                        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment_id] = data
+        
+        self.active_id = segment_ids[-1] if segment_ids else 0
+        self._open_active()
+        return StoredChain(self), snapshot
+    
+    def _open_active(self):
+        self.active_file = open(self._segment_path(self.active_id), 'ab')
+        self.active_size = self.active_file.tell()
+    
+    def _roll_segment(self):
+        self._sync_locked()
+        self.active_file.close()
+        old_map = self.maps.pop(self.active_id, None)
+        if old_map is not None:
+            old_map.close()
+        with open(self._segment_path(self.active_id), 'rb') as f:
+            self.maps[self.active_id] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.active_id += 1
+        self._open_active()
+    
+    def append(self, block):
+        payload = json.dumps(block.to_dict()).encode()
+        record = self.RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self.lock:
+            if self.active_size and self.active_size + len(record) > self.segment_bytes:
+                self._roll_segment()
+            self.active_file.write(record)
+            self.segment_ids.append(self.active_id)
+            self.offsets.append(self.active_size)
+            self.active_size += len(record)
+            self.unsynced += 1
+            if self.unsynced >= self.fsync_every or time.time() - self.last_sync >= self.fsync_interval:
+                self._sync_locked()
+    
+    def _sync_locked(self):
+        self.active_file.flush()
+        os.fsync(self.active_file.fileno())
+        if self.pending_file is not None:
+            os.fsync(self.pending_file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.time()
+    
+    def _pending_path(self):
+        return os.path.join(self.directory, 'pending.log')
+    
+    def append_pending(self, vote):
+        """Journal a vote that is queued but not yet in a block"""
+        payload = json.dumps(vote).encode()
+        with self.lock:
+            if self.pending_file is None:
+                self.pending_file = open(self._pending_path(), 'ab')
+            self.pending_file.write(self.RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self.pending_file.flush()  # Survives a process crash; fsync follows the block log's policy
+            self.pending_count += 1
+            self.unsynced += 1
+            if self.unsynced >= self.fsync_every or time.time() - self.last_sync >= self.fsync_interval:
+                self._sync_locked()
+    
+    def load_pending(self):
+        """Votes in the pending journal, up to any torn tail"""
+        try:
+            with open(self._pending_path(), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        votes = []
+        offset = 0
+        header_size = self.RECORD_HEADER.size
+        while offset + header_size <= len(data):
+            length, checksum = self.RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + header_size:offset + header_size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            votes.append(json.loads(payload))
+            offset += header_size + length
+        self.pending_count = len(votes)
+        return votes
+    
+    def trim_pending(self, votes):
+        """After a block seals votes: compact the journal to the votes still waiting once it has grown.
+        
+        Rewriting it for every block would cost an extra fsync per block and defeat the batched log fsyncs.
+        """
+        if self.pending_count >= max(self.PENDING_COMPACT_AT, 2 * len(votes)):
+            self.rewrite_pending(votes)
+    
+    def rewrite_pending(self, votes):
+        """Replace the pending journal with the votes still waiting, once sealed ones are durable"""
+        with self.lock:
+            if not self.pending_count and not votes:
+                return  # Nothing journaled (inline mining), so nothing to clear
+            self._sync_locked()
+            if self.pending_file is not None:
+                self.pending_file.close()
+                self.pending_file = None
+            path = self._pending_path()
+            with open(path + '.tmp', 'wb') as f:
+                for vote in votes:
+                    payload = json.dumps(vote).encode()
+                    f.write(self.RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+            self.pending_count = len(votes)
+    
+    def sync(self):
+        if self.active_file is not None:
+            with self.lock:
+                self._sync_locked()
+    
+    def _read_at(self, segment_id, offset):
+        header_size = self.RECORD_HEADER.size
+        data = self.maps.get(segment_id)
+        if data is not None and offset < len(data):
+            length, _ = self.RECORD_HEADER.unpack_from(data, offset)
+            payload = data[offset + header_size:offset + header_size + length]
         else:
-            print(f"Block mined: {self.hash} after {iterations} iterations")
+            # Written since the active segment was mapped: flush and read through the file
+            if os.getpid() == self.pid:  # A forked reader must not flush the parent's buffer
+                self.active_file.flush()
+            with open(self._segment_path(segment_id), 'rb') as f:
+                f.seek(offset)
+                length, _ = self.RECORD_HEADER.unpack(f.read(header_size))
+                payload = f.read(length)
+        return Block.from_dict(json.loads(payload))
+    
+    def read_block(self, index):
+        with self.lock:
+            return self._read_at(self.segment_ids[index], self.offsets[index])
+    
+    def __len__(self):
+        return len(self.offsets)
+    
+    def write_snapshot(self, state):
+        """Atomically write a checksummed snapshot, keeping the previous one as a fallback"""
+        if isinstance(state.get('voters'), VoterRegistry):
+            # Saved beside the snapshot so startup can memory-map it rather than unpickle it
+            name = f"voters-{state['height']:012d}.idx"
+            state['voters'].save(os.path.join(self.directory, name))
+            state = dict(state, voters=name)
+        with self.lock:
+            self._sync_locked()
+            state = dict(state, segment_ids=self.segment_ids, offsets=self.offsets,
+                         log_position=(self.active_id, self.active_size))
+            payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        path = os.path.join(self.directory, f"snapshot-{state['height']:012d}.pkl")
+        with open(path + '.tmp', 'wb') as f:
+            f.write(struct.pack('>I', zlib.crc32(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        for old in self._snapshot_paths()[2:]:
+            os.remove(old)
+        kept = {os.path.basename(path).replace('snapshot-', 'voters-').replace('.pkl', '.idx')
+                for path in self._snapshot_paths()}
+        for name in os.listdir(self.directory):
+            if name.startswith('voters-') and name.endswith('.idx') and name not in kept:
+                os.remove(os.path.join(self.directory, name))
+    
+    def truncate(self, length):
+        """Drop blocks from `length` onwards, keeping the log before them (a fork replaces only the tail).
         
-        return self.hash
+        Snapshots past the new tip are removed before the log is cut, so a crash at any step
+        leaves a readable prefix of the old chain and never loses the blocks before `length`.
+        """
+        with self.lock:
+            if length >= len(self.offsets):
+                return
+            self._sync_locked()
+            for name in os.listdir(self.directory):
+                if ((name.startswith('snapshot-') and name.endswith('.pkl') and int(name[9:21]) > length)
+                        or (name.startswith('voters-') and name.endswith('.idx') and int(name[7:19]) > length)):
+                    os.remove(os.path.join(self.directory, name))
+            segment_id, offset = self.segment_ids[length], self.offsets[length]
+            self.active_file.close()
+            for stale in reversed(self._segment_ids_on_disk()):
+                if stale < segment_id:
+                    break
+                data = self.maps.pop(stale, None)
+                if data is not None:
+                    data.close()
+                if stale > segment_id:
+                    os.remove(self._segment_path(stale))
+            with open(self._segment_path(segment_id), 'r+b') as f:
+                f.truncate(offset)
+                os.fsync(f.fileno())
+            del self.segment_ids[length:]
+            del self.offsets[length:]
+            self.active_id = segment_id
+            self._open_active()
+    
+    def close(self):
+        if self.active_file is not None:
+            self.sync()
+            self.active_file.close()
+            self.active_file = None
+        if self.pending_file is not None:
+            self.pending_file.close()
+            self.pending_file = None
+        for data in self.maps.values():
+            data.close()
+        self.maps = {}
 
-class Blockchain:
+class StoredChain:
+    """List-like view over a ChainStore; blocks are decoded from the log on access"""
+    
+    def __init__(self, store):
+        self.store = store
+        self.tip = None  # Cached last block, read on every append
+    
+    def __len__(self):
+        return len(self.store)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index == len(self) - 1 and self.tip is not None:
+            return self.tip
+        if not 0 <= index < len(self):
+            raise IndexError('block index out of range')
+        return self.store.read_block(index)
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+    
+    def append(self, block):
+        self.store.append(block)
+        self.tip = block
+    
+    def truncate(self, length):
+        self.store.truncate(length)
+        self.tip = None
+
+def _is_digest(value):
+    """True for a 64-character lowercase hex SHA-256 digest"""
+    return isinstance(value, str) and len(value) == 64 and value == value.lower() and all(c in '0123456789abcdef' for c in value)
+
+class CompactChain:
+    """Columnar in-memory block store; Block objects are materialized on access.
+    
+    Vote blocks keep hashes as 32-byte digests in contiguous bytearrays, block
+    timestamps and nonces in typed arrays, and each vote as a voter ID plus an
+    interned ballot (a candidate ID, or a candidate name on older chains).
+    Blocks that don't fit that shape (genesis, admin actions, unusual payloads)
+    are kept verbatim.
+    """
+    
+    KIND_VOTE, KIND_BATCH, KIND_OTHER = 0, 1, 2
+    VOTE_KEYS = ('voter_id', 'vote', 'timestamp')
+    
+    def __init__(self, blocks=()):
+        self.kinds = bytearray()
+        self.timestamps = array.array('d')
+        self.nonces = array.array('Q')
+        self.hashes = bytearray()
+        self.previous_hashes = bytearray()
+        self.vote_start = array.array('Q', [0])  # Block i's votes are vote_start[i]:vote_start[i + 1]
+        self.voter_ids = []
+        self.vote_candidates = array.array('I')
+        self.vote_timestamps = array.array('d')
+        self.ballots = []  # Interned ballot values, as stored in the votes
+        self.ballot_ids = {}
+        self.merkle_roots = {}  # Batch block index -> 32-byte root
+        self.others = {}  # Block index -> Block kept verbatim
+        for block in blocks:
+            self.append(block)
+    
+    def __len__(self):
+        return len(self.kinds)
+    
+    def _compact_votes(self, block):
+        """Return the block's votes as a list of dicts, or None if it must be kept verbatim"""
+        if block.index != len(self) or type(block.timestamp) is not float:
+            return None
+        if not (_is_digest(block.hash) and _is_digest(block.previous_hash) and 0 <= block.nonce < 2 ** 64):
+            return None
+        vote_data = block.vote_data
+        if block.merkle_root is None:
+            votes = [vote_data]
+        elif isinstance(vote_data, dict) and list(vote_data) == ['votes'] and _is_digest(block.merkle_root):
+            votes = vote_data['votes']
+        else:
+            return None
+        for vote in votes:
+            if not isinstance(vote, dict) or tuple(vote) != self.VOTE_KEYS:
+                return None
+            if type(vote['voter_id']) is not str or type(vote['timestamp']) is not float:
+                return None
+            if type(vote['vote']) is not int and type(vote['vote']) is not str:
+                return None
+        return votes
+    
+    def append(self, block):
+        votes = self._compact_votes(block)
+        if votes is None:
+            self.kinds.append(self.KIND_OTHER)
+            self.others[block.index] = block
+            self.timestamps.append(0.0)
+            self.nonces.append(0)
+            self.hashes += bytes(32)
+            self.previous_hashes += bytes(32)
+            self.vote_start.append(self.vote_start[-1])
+            return
+        
+        if block.merkle_root is None:
+            self.kinds.append(self.KIND_VOTE)
+        else:
+            self.kinds.append(self.KIND_BATCH)
+            self.merkle_roots[block.index] = bytes.fromhex(block.merkle_root)
+        self.timestamps.append(block.timestamp)
+        self.nonces.append(block.nonce)
+        self.hashes += bytes.fromhex(block.hash)
+        self.previous_hashes += bytes.fromhex(block.previous_hash)
+        for vote in votes:
+            ballot_id = self.ballot_ids.get(vote['vote'])
+            if ballot_id is None:
+                ballot_id = self.ballot_ids[vote['vote']] = len(self.ballots)
+                self.ballots.append(vote['vote'])
+            self.voter_ids.append(vote['voter_id'])
+            self.vote_candidates.append(ballot_id)
+            self.vote_timestamps.append(vote['timestamp'])
+        self.vote_start.append(self.vote_start[-1] + len(votes))
+    
+    def truncate(self, length):
+        """Drop blocks from `length` onwards; interned ballots are kept"""
+        for index in range(length, len(self)):
+            self.others.pop(index, None)
+            self.merkle_roots.pop(index, None)
+        votes = self.vote_start[length]
+        del self.voter_ids[votes:]
+        del self.vote_candidates[votes:]
+        del self.vote_timestamps[votes:]
+        del self.vote_start[length + 1:]
+        del self.kinds[length:]
+        del self.timestamps[length:]
+        del self.nonces[length:]
+        del self.hashes[length * 32:]
+        del self.previous_hashes[length * 32:]
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('block index out of range')
+        kind = self.kinds[index]
+        if kind == self.KIND_OTHER:
+            return self.others[index]
+        
+        votes = [{
+            'voter_id': self.voter_ids[v],
+            'vote': self.ballots[self.vote_candidates[v]],
+            'timestamp': self.vote_timestamps[v]
+        } for v in range(self.vote_start[index], self.vote_start[index + 1])]
+        return Block.from_dict({
+            'index': index,
+            'timestamp': self.timestamps[index],
+            'vote_data': votes[0] if kind == self.KIND_VOTE else {'votes': votes},
+            'previous_hash': self.previous_hashes[index * 32:index * 32 + 32].hex(),
+            'merkle_root': self.merkle_roots[index].hex() if kind == self.KIND_BATCH else None,
+            'nonce': self.nonces[index],
+            'hash': self.hashes[index * 32:index * 32 + 32].hex()
+        })
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+def _prefix_buckets(keys):
+    """Hash keys grouped by their first two bytes, for merging one small bucket at a time.
+    
+    Keys are uniform hashes, so buckets stay small; unlike one big sorted() call, sorting them
+    never holds the GIL for long, which matters on the background merge threads below.
+    """
+    buckets = {}
+    for key in keys:
+        buckets.setdefault(key[0] << 8 | key[1], []).append(key)
+    return buckets
+
+class DigestIndex:
+    """SHA-256 hex digest -> integer map that stays cheap to snapshot at millions of entries.
+    
+    Compacted entries live in a sorted blob of 32-byte digests with a parallel
+    array of values (binary search on lookup); new entries go to a small dict.
+    Once it reaches 1/8 of the base (at least COMPACT_AT entries) it is frozen
+    and merged into a new base on a background thread, so the caller's lock
+    isn't held for the merge.
+    """
+    
+    COMPACT_AT = 65536  # Minimum recent entries held before merging into the sorted base
+    _ABSENT = object()
+    
     def __init__(self):
-        self.chain = [self.create_genesis_block()]
+        self.base = (b'', array.array('Q'))  # (sorted key blob, values), replaced whole
+        self.recent = {}
+        self.merging = {}  # Frozen recent entries being merged into the base
+        self.merger = None  # Thread running the merge
+    
+    def __len__(self):
+        return len(self.base[1]) + len(self.merging) + len(self.recent)
+    
+    def add(self, digest, value):
+        self._put(bytes.fromhex(digest), value)
+    
+    def discard(self, digest):
+        self._put(bytes.fromhex(digest), None)  # None marks the entry removed until the next merge drops it
+    
+    def _put(self, key, value):
+        self.recent[key] = value
+        if self.merger is None and len(self.recent) >= max(self.COMPACT_AT, len(self.base[1]) // 8):
+            # Readers check recent, then merging, then the base: freeze before starting a new dict
+            self.merging = self.recent
+            self.recent = {}
+            self.merger = threading.Thread(target=self._merge_in_background, name='index-compaction', daemon=True)
+            self.merger.start()
+    
+    def get(self, digest):
+        try:
+            key = bytes.fromhex(digest)
+        except ValueError:
+            return None
+        value = self.recent.get(key, self._ABSENT)
+        if value is self._ABSENT:
+            value = self.merging.get(key, self._ABSENT)
+        if value is self._ABSENT:
+            value = self._search(self.base, key)
+        return value
+    
+    @staticmethod
+    def _lower_bound(base, key, low=0):
+        keys, values = base
+        high = len(values)
+        while low < high:
+            mid = (low + high) // 2
+            if keys[mid * 32:mid * 32 + 32] < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+    
+    def _search(self, base, key):
+        keys, values = base
+        low = self._lower_bound(base, key)
+        if low < len(values) and keys[low * 32:low * 32 + 32] == key:
+            return values[low]
+        return None
+    
+    def _merged(self, base, entries):
+        """New base with entries merged in: only the new keys are sorted, and base runs are copied as slices"""
+        keys, values = base
+        new_keys = bytearray()
+        new_values = array.array('Q')
+        copied = 0  # Base entries copied so far
+        with memoryview(keys) as view:
+            buckets = _prefix_buckets(entries)
+            for key in (key for bucket in sorted(buckets) for key in sorted(buckets[bucket])):
+                position = self._lower_bound(base, key, copied)
+                new_keys += view[copied * 32:position * 32]
+                new_values += values[copied:position]
+                if entries[key] is not None:
+                    new_keys += key
+                    new_values.append(entries[key])
+                # An entry added again (or removed) replaces the base's
+                copied = position + 1 if position < len(values) and view[position * 32:position * 32 + 32] == key else position
+            new_keys += view[copied * 32:]
+            new_values += values[copied:]
+        return new_keys, new_values
+    
+    def _merge_in_background(self):
+        base = self._merged(self.base, self.merging)
+        self.base = base  # Published before merging is cleared, so lookups never miss an entry
+        self.merging = {}
+        self.merger = None
+    
+    def compact(self):
+        """Merge every entry into the sorted base now (caller serializes writers)"""
+        merger = self.merger
+        if merger is not None:
+            merger.join()
+        if self.recent:
+            self.base = self._merged(self.base, self.recent)
+            self.recent = {}
+    
+    def __getstate__(self):
+        self.compact()
+        keys, values = self.base
+        return {'keys': keys, 'values': values}
+    
+    def __setstate__(self, state):
+        self.base = (state['keys'], state['values'])
+        self.recent = state.get('recent', {})  # Snapshots from before background merges
+        self.merging = {}
+        self.merger = None
+
+class VoterRegistry:
+    """Set of voter IDs kept as 16-byte BLAKE2b hashes, with a Bloom filter in front.
+    
+    Hashes live in one sorted blob, bucketed by their first two bytes, plus a set of recent
+    additions merged in once it reaches 1/8 of the blob (so merging stays amortized O(1) per add).
+    The merge runs on a background thread and publishes a new blob, so add() never waits for it.
+    A blocked Bloom filter (all bits of a key in one 64-bit word) answers most "hasn't voted yet"
+    checks with a single AND; it grows by adding layers of twice the size. save() writes
+    a file that open() memory-maps. Answers match a set of the raw IDs unless two IDs collide on
+    128 bits (around 1e-24 at ten million voters).
+    """
+    
+    KEY_BYTES = 16
+    BUCKETS = 65536
+    COMPACT_AT = 65536  # Minimum recent additions before a merge
+    BLOOM_BITS_PER_KEY = 10  # 7 bits per key within a 64-bit word: ~1-2% false positives per layer
+    BLOOM_INITIAL_CAPACITY = 65536
+    FILE_MAGIC = b'VOTERS01'
+    FILE_HEADER = struct.Struct('>8sQQ')  # magic, key count, bloom layers
+    LAYER_HEADER = struct.Struct('>QQ')  # capacity, keys added
+    
+    def __init__(self, voter_ids=()):
+        self.lock = threading.Lock()  # Serializes writers; lookups read published state without it
+        # (key blob, byte offset of the first key, bucket start positions, key count), replaced whole
+        self.base = (b'', 0, array.array('Q', [0]) * (self.BUCKETS + 1), 0)
+        self.recent = set()
+        self.merging = set()  # Frozen recent keys being merged into the base
+        self.merger = None  # Thread running the merge
+        self.layers = [self._new_layer(self.BLOOM_INITIAL_CAPACITY)]  # [words, capacity, added]
+        self.update(voter_ids)
+    
+    @classmethod
+    def key(cls, voter_id):
+        return hashlib.blake2b(str(voter_id).encode(), digest_size=cls.KEY_BYTES).digest()
+    
+    @classmethod
+    def _new_layer(cls, capacity):
+        return [array.array('Q', [0]) * (capacity * cls.BLOOM_BITS_PER_KEY // 64), capacity, 0]
+    
+    @staticmethod
+    def _bloom_probe(key):
+        """(word selector, 7-bit mask) for a key; the hash is already uniform, so its bytes are used directly"""
+        mask = (1 << (key[8] & 63) | 1 << (key[9] & 63) | 1 << (key[10] & 63) | 1 << (key[11] & 63)
+                | 1 << (key[12] & 63) | 1 << (key[13] & 63) | 1 << (key[14] & 63))
+        return int.from_bytes(key[:8], 'big'), mask
+    
+    def _maybe_contains(self, selector, mask):
+        for words, _, _ in self.layers:
+            if words[selector % len(words)] & mask == mask:
+                return True
+        return False
+    
+    def _bloom_add(self, selector, mask):
+        layer = self.layers[-1]
+        if layer[2] >= layer[1]:
+            layer = self._new_layer(layer[1] * 2)  # Full: start a layer twice the size
+            self.layers.append(layer)
+        words = layer[0]
+        words[selector % len(words)] |= mask
+        layer[2] += 1
+    
+    def _lower_bound(self, base, key):
+        keys, offset, starts, _ = base
+        bucket = key[0] << 8 | key[1]
+        low, high = starts[bucket], starts[bucket + 1]
+        size = self.KEY_BYTES
+        while low < high:
+            mid = (low + high) // 2
+            start = offset + mid * size
+            if keys[start:start + size] < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+    
+    def _in_base(self, key, base):
+        keys, offset, starts, _ = base
+        position = self._lower_bound(base, key)
+        start = offset + position * self.KEY_BYTES
+        return position < starts[(key[0] << 8 | key[1]) + 1] and keys[start:start + self.KEY_BYTES] == key
+    
+    def _contains_key(self, key, selector, mask):
+        if not self._maybe_contains(selector, mask):
+            return False
+        # Check recent, then merging, then the base: each is published before the one before it is cleared
+        if key in self.recent or key in self.merging:
+            return True
+        return self._in_base(key, self.base)
+    
+    def __contains__(self, voter_id):
+        key = self.key(voter_id)
+        return self._contains_key(key, *self._bloom_probe(key))
+    
+    def __len__(self):
+        with self.lock:
+            return self.base[3] + len(self.merging) + len(self.recent)
+    
+    def add(self, voter_id):
+        key = self.key(voter_id)
+        selector, mask = self._bloom_probe(key)
+        with self.lock:
+            if self._contains_key(key, selector, mask):
+                return
+            self._bloom_add(selector, mask)
+            self.recent.add(key)
+            if self.merger is None and len(self.recent) >= max(self.COMPACT_AT, self.base[3] // 8):
+                self.merging = self.recent
+                self.recent = set()
+                self.merger = threading.Thread(target=self._merge_in_background, name='voter-compaction', daemon=True)
+                self.merger.start()
+    
+    def update(self, voter_ids):
+        for voter_id in voter_ids:
+            self.add(voter_id)
+    
+    def _merged(self, base, new_keys):
+        """New base with new_keys merged in, one bucket at a time; buckets without new keys are copied as runs"""
+        keys, offset, starts, count = base
+        size = self.KEY_BYTES
+        counts = array.array('Q', (starts[i + 1] - starts[i] for i in range(self.BUCKETS)))
+        merged = bytearray((count + len(new_keys)) * size)  # Filled in place, never resized
+        copied = written = 0  # Base keys copied, bytes written
+        with memoryview(keys) as view:
+            buckets = _prefix_buckets(new_keys)
+            for bucket in sorted(buckets):
+                low, high = starts[bucket], starts[bucket + 1]
+                # Only buckets that gain keys are split into per-key objects, a few dozen at a time
+                run = (low - copied) * size
+                merged[written:written + run] = view[offset + copied * size:offset + low * size]
+                written += run
+                chunk = [keys[start:start + size] for start in range(offset + low * size, offset + high * size, size)]
+                chunk += buckets[bucket]
+                chunk.sort()
+                chunk = b''.join(chunk)
+                merged[written:written + len(chunk)] = chunk
+                written += len(chunk)
+                counts[bucket] += len(buckets[bucket])
+                copied = high
+            merged[written:] = view[offset + copied * size:offset + count * size]
+        new_starts = array.array('Q', itertools.accumulate(counts, initial=0))
+        return merged, 0, new_starts, count + len(new_keys)
+    
+    def _merge_in_background(self):
+        base = self._merged(self.base, self.merging)  # Only this thread replaces the base while it runs
+        with self.lock:
+            self.base = base
+            self.merging = set()
+            self.merger = None
+    
+    @contextlib.contextmanager
+    def _compacted(self):
+        """Hold the lock with every key merged into the base"""
+        while True:
+            merger = self.merger
+            if merger is not None:
+                merger.join()
+            with self.lock:
+                if self.merger is not None:
+                    continue  # Another merge started before we got the lock
+                if self.recent:
+                    self.base = self._merged(self.base, self.recent)
+                    self.recent = set()
+                yield self.base
+                return
+    
+    def save(self, path):
+        """Write the registry to path atomically, in the format open() maps"""
+        with self._compacted() as (keys, offset, starts, count):
+            with open(path + '.tmp', 'wb') as f:
+                f.write(self.FILE_HEADER.pack(self.FILE_MAGIC, count, len(self.layers)))
+                for _, capacity, added in self.layers:
+                    f.write(self.LAYER_HEADER.pack(capacity, added))
+                for words, _, _ in self.layers:
+                    f.write(words.tobytes())
+                f.write(starts.tobytes())
+                f.write(keys[offset:offset + count * self.KEY_BYTES])
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+    
+    @classmethod
+    def open(cls, path):
+        """Load a saved registry, memory-mapping the key blob instead of reading it"""
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, layer_count = cls.FILE_HEADER.unpack_from(data, 0)
+        if magic != cls.FILE_MAGIC:
+            raise ValueError(f'{path} is not a voter registry')
+        position = cls.FILE_HEADER.size
+        layers = []
+        for _ in range(layer_count):
+            capacity, added = cls.LAYER_HEADER.unpack_from(data, position)
+            layers.append([None, capacity, added])
+            position += cls.LAYER_HEADER.size
+        for layer in layers:
+            size = layer[1] * cls.BLOOM_BITS_PER_KEY // 64 * 8
+            layer[0] = array.array('Q')
+            layer[0].frombytes(data[position:position + size])
+            position += size
+        starts = array.array('Q')
+        starts.frombytes(data[position:position + (cls.BUCKETS + 1) * 8])
+        position += (cls.BUCKETS + 1) * 8
+        if len(data) != position + count * cls.KEY_BYTES:
+            raise ValueError(f'{path} is truncated')
+        registry = cls()
+        registry.layers = layers
+        registry.base = (data, position, starts, count)
+        return registry
+    
+    def __getstate__(self):
+        with self._compacted() as (keys, offset, starts, count):
+            return {'keys': bytes(keys[offset:offset + count * self.KEY_BYTES]), 'starts': starts,
+                    'count': count, 'layers': [list(layer) for layer in self.layers]}
+    
+    def __setstate__(self, state):
+        self.lock = threading.Lock()
+        self.base = (state['keys'], 0, state['starts'], state['count'])
+        self.recent = set()
+        self.merging = set()
+        self.merger = None
+        self.layers = [list(layer) for layer in state['layers']]
+
+# Shared secret peers must send as X-Node-Token to use /sync/*, /gossip and /nodes/*; unset disables peering
+NODE_SYNC_TOKEN = os.environ.get("NODE_SYNC_TOKEN")
+
+DEFAULT_CANDIDATES = ["Candidate A", "Candidate B", "Candidate C"]
+# Fixed so every node (and every shard of the same election) starts from the same genesis block
+GENESIS_TIMESTAMP = 1700000000.0
+# Proof of work every block must carry, recorded in the genesis block; mining may use more, never less
+MIN_DIFFICULTY = 1
+
+class CandidateRegistry:
+    """Stable candidate IDs and their current display names.
+    
+    IDs are positions in `names`: assigned in order of addition, never reused or removed. Ballots
+    record the ID, so a rename only replaces the name and leaves votes and the tally untouched.
+    `version` increases with every change. The registry is rebuilt by replaying the candidate blocks
+    on the chain, starting from the genesis block's candidates (DEFAULT_CANDIDATES if it lists none).
+    `changes` records what each block changed, so a fork can revert them instead of replaying.
+    """
+    
+    def __init__(self, names=()):
+        self.names = []  # Candidate ID -> current name
+        self.ids = {}  # Current name -> candidate ID
+        self.version = 0
+        self.changes = []  # (block index, candidate ID, name before, or None if the block added it)
+        for name in names:
+            self.add(name)
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('changes', None)  # Pickled before changes were recorded: history unknown
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def __contains__(self, name):
+        return name in self.ids
+    
+    def add(self, name):
+        candidate_id = len(self.names)
+        self.names.append(name)
+        self.ids[name] = candidate_id
+        self.version += 1
+        return candidate_id
+    
+    def rename(self, candidate_id, new_name):
+        del self.ids[self.names[candidate_id]]
+        self.names[candidate_id] = new_name
+        self.ids[new_name] = candidate_id
+        self.version += 1
+    
+    def resolve(self, ballot):
+        """Candidate ID for a ballot: an int is an ID, a string is a current name. None if unknown."""
+        if type(ballot) is int:
+            return ballot if 0 <= ballot < len(self.names) else None
+        return self.ids.get(ballot) if isinstance(ballot, str) else None
+    
+    def apply(self, vote_data, index):
+        """Replay block `index`'s add/modify candidate action; returns the ID of a newly added candidate, else None.
+        
+        Older chains record modify actions by name only, without a candidate_id.
+        """
+        if not isinstance(vote_data, dict):
+            return None
+        action = vote_data.get('action')
+        if action == 'add_candidate':
+            name = vote_data.get('candidate')
+            if not isinstance(name, str) or name in self.ids or vote_data.get('candidate_id', len(self.names)) != len(self.names):
+                return None
+            candidate_id = self.add(name)
+            self._record(index, candidate_id, None)
+            return candidate_id
+        if action == 'modify_candidate':
+            candidate_id = vote_data.get('candidate_id')
+            if candidate_id is None:
+                candidate_id = self.ids.get(vote_data.get('old_name'))
+            new_name = vote_data.get('new_name')
+            if self.resolve(candidate_id) is not None and isinstance(new_name, str) and new_name not in self.ids:
+                self._record(index, candidate_id, self.names[candidate_id])
+                self.rename(candidate_id, new_name)
+        return None
+    
+    def _record(self, index, candidate_id, previous_name):
+        if self.changes is not None:
+            self.changes.append((index, candidate_id, previous_name))
+    
+    def revert(self, index):
+        """Undo what blocks `index` and later changed; False if the history isn't known"""
+        if self.changes is None:
+            return False
+        while self.changes and self.changes[-1][0] >= index:
+            _, candidate_id, previous_name = self.changes.pop()
+            if previous_name is None:
+                del self.ids[self.names.pop()]
+                self.version += 1
+            else:
+                self.rename(candidate_id, previous_name)
+        return True
+
+class Blockchain:
+    RECEIPT_POSITION_BITS = 20  # Receipt locations pack up to ~1M votes per block
+    
+    def __init__(self, storage=None, voter_registry=VoterRegistry, election=None):
+        self.storage = storage  # Optional ChainStore for durable blocks
+        self.voter_registry = voter_registry  # Factory for the voter set; anything with add/update/in/len
+        self.election = election  # Genesis fields of an election shard: election ID, title, candidates
+        self.chain = CompactChain([self.create_genesis_block()])
         self.difficulty = 1  # Reduced difficulty for faster mining
-        self.voters = set()
-        self.candidates = ["Candidate A", "Candidate B", "Candidate C"]
+        self.miner = SerialMiner()
+        self.parallel_miner = ProcessPoolMiner() if (os.cpu_count() or 1) > 1 else None
+        self.parallel_min_difficulty = 3  # Below this, pool dispatch costs more than it saves
+        self.voters = self.voter_registry()
+        self.candidate_registry = CandidateRegistry(self.genesis_candidates())
         self.pending_transactions = []
         self.mining_reward = 1
-        self.nodes = set()  # For consensus
-        self.lock = threading.Lock()  # Thread safety for mining
+        self.nodes = set()  # For consensus: peer host:port addresses
+        self.sessions = {}  # Peer -> pooled requests.Session
+        self.lock = threading.Lock()  # Guards chain and index updates; never held while mining
+        self.mining_lock = threading.RLock()  # One nonce search at a time; the miners aren't shared safely
+        self.verify_lock = threading.Lock()
+        self.verification_job = {}  # Progress of the last full verification run
+        self.vote_counts = [0] * len(self.candidate_registry)  # Running tally: candidate ID -> votes on chain
+        self.unresolved_votes = 0  # Ballots naming no known candidate (possible on older chains)
+        self.receipts = DigestIndex()  # Vote receipt -> packed (block index, position in block)
+        self.block_hashes = DigestIndex()  # Block hash -> block index
+        self.voter_blocks = DigestIndex()  # Hashed voter ID -> index of the block holding their vote
+        self.batch_size = 1  # Votes per block; 1 mines every vote immediately
+        self.batch_timeout = 5.0  # Max seconds a vote waits in pending_transactions
+        self.batch_timer = None
+        self.seal_in_background = False  # Queue votes and mine them on the sealer thread instead of inline
+        self.sealer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sealer')
+        self.seal_scheduled = False
+        self.checkpoint = None  # Trusted (height, tip hash) for incremental verification
+        self.gossip = None  # Optional GossipRelay that pushes new votes and blocks to peers
+        if storage is not None:
+            self.load_from_storage()
+            self.restore_pending()
+        else:
+            self.rebuild_indexes()
+        if self.checkpoint is None:
+            self.checkpoint = (1, self.chain[0].hash)
+    
+    @property
+    def candidates(self):
+        """Current candidate names, indexed by candidate ID"""
+        return self.candidate_registry.names
+    
+    @property
+    def candidates_version(self):
+        """Changes whenever a candidate is added or renamed; part of the page cache key"""
+        return self.candidate_registry.version
     
     def create_genesis_block(self):
-        return Block(0, time.time(), {"message": "Genesis Block"}, "0")
+        return Block(0, GENESIS_TIMESTAMP, {"message": "Genesis Block", "difficulty": MIN_DIFFICULTY,
+                                            **(self.election or {})}, "0")
+    
+    @property
+    def min_difficulty(self):
+        """Leading zero hex digits every block must have, from the genesis block (1 on older chains)"""
+        vote_data = self.chain[0].vote_data
+        difficulty = vote_data.get('difficulty', 1) if isinstance(vote_data, dict) else 1
+        return difficulty if type(difficulty) is int and difficulty >= 1 else 1
+    
+    def genesis_candidates(self):
+        """Candidates the chain starts with: listed in an election's genesis block, else DEFAULT_CANDIDATES"""
+        vote_data = self.chain[0].vote_data
+        if isinstance(vote_data, dict) and 'candidates' in vote_data:
+            return vote_data['candidates']
+        return DEFAULT_CANDIDATES
     
     def get_latest_block(self):
         return self.chain[-1]
     
+    def get_miner(self, difficulty):
+        """Serial mining for low difficulties, the process pool above parallel_min_difficulty"""
+        if self.parallel_miner is not None and difficulty >= self.parallel_min_difficulty:
+            return self.parallel_miner
+        return self.miner
+    
+    def mine(self, block):
+        difficulty = max(self.difficulty, self.min_difficulty)  # Peers reject blocks below the genesis minimum
+        with self.mining_lock:
+            return block.mine_block(difficulty, self.get_miner(difficulty))
+    
+    def append_block(self, block):
+        """Append a mined block to the tip and update indexes and storage (caller holds the lock)"""
+        # Candidate actions first, so a snapshot taken for this block already includes them
+        self.apply_candidate_action(block)
+        self.chain.append(block)
+        self.index_block(block)
+        if self.storage is not None and len(self.chain) % self.storage.snapshot_every == 0:
+            self.storage.write_snapshot(self.snapshot_state())
+    
+    def load_from_storage(self):
+        """Rebuild chain and indexes from storage: latest snapshot plus replay of the log tail"""
+        self.chain, snapshot = self.storage.load()
+        if len(self.chain) == 0:
+            self.chain.append(self.create_genesis_block())
+        if snapshot is None or not isinstance(snapshot['candidates'], CandidateRegistry):
+            self.rebuild_indexes()  # Snapshots from before candidate IDs tallied by name
+            return
+        self.voters = snapshot['voters']
+        self.vote_counts = snapshot['vote_counts']
+        self.unresolved_votes = snapshot['unresolved_votes']
+        self.receipts = snapshot['receipts']
+        self.block_hashes = snapshot['block_hashes']
+        self.voter_blocks = snapshot['voter_blocks']
+        self.candidate_registry = snapshot['candidates']
+        self.checkpoint = snapshot['checkpoint']
+        for index in range(snapshot['height'], len(self.chain)):
+            block = self.chain[index]
+            self.index_block(block)
+            self.apply_candidate_action(block)
+    
+    def restore_pending(self):
+        """Seal journaled votes that were queued but not mined before the last shutdown.
+        
+        The snapshot's voter set already holds these voters (their IDs are reserved when queued),
+        so only a vote sealed in a block counts as done.
+        """
+        queued = set()
+        for vote in self.storage.load_pending():
+            voter_id = vote.get('voter_id')
+            if voter_id in queued or self.voter_blocks.get(voter_digest(voter_id)) is not None:
+                continue
+            queued.add(voter_id)
+            self.voters.add(voter_id)
+            self.pending_transactions.append(vote)
+        self.storage.rewrite_pending(self.pending_transactions)
+        self.flush_pending()
+    
+    def snapshot_state(self):
+        return {
+            'height': len(self.chain),
+            'voters': self.voters,
+            'vote_counts': self.vote_counts,
+            'unresolved_votes': self.unresolved_votes,
+            'receipts': self.receipts,
+            'block_hashes': self.block_hashes,
+            'voter_blocks': self.voter_blocks,
+            'candidates': self.candidate_registry,
+            'checkpoint': self.checkpoint
+        }
+    
     def add_block(self, new_block):
-        with self.lock:
+        def build():
+            new_block.index = len(self.chain)
             new_block.previous_hash = self.get_latest_block().hash
-            new_block.hash = new_block.mine_block(self.difficulty)
-            self.chain.append(new_block)
             return new_block
+        def commit(block):
+            self.append_block(block)
+            return True
+        return self.mine_and_commit(build, commit)
     
-    def is_chain_valid(self):
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i-1]
-            
-            # Verify current block hash
-            if current_block.hash != current_block.calculate_hash():
+    def mine_and_commit(self, build, commit):
+        """Mine a block outside the chain lock; only building it on the tip and appending it are serialized.
+        
+        build() runs under the lock and returns the block to mine on the current tip, or None to give up.
+        After mining, commit(block) runs under the lock if the tip hasn't moved; it appends the block and
+        returns True, or returns False when its contents went stale. Either way a miss goes back to build().
+        """
+        with timed_lock(self.mining_lock, 'mining', 'mine_and_commit'):
+            while True:
+                with timed_lock(self.lock, 'chain', 'build'):
+                    block = build()
+                    if block is None:
+                        return None
+                block.hash = self.mine(block)
+                with timed_lock(self.lock, 'chain', 'commit'):
+                    if block.previous_hash == self.get_latest_block().hash and commit(block):
+                        break
+        self.announce_block(block)
+        return block
+    
+    @staticmethod
+    def block_votes(block):
+        """Return the votes stored in a block, for both single-vote and batched blocks"""
+        vote_data = block.vote_data
+        if not isinstance(vote_data, dict):
+            return []
+        if 'votes' in vote_data:
+            return vote_data['votes']
+        if 'vote' in vote_data:
+            return [vote_data]
+        return []
+    
+    def scan_votes(self):
+        """Full scan of the chain, returning (voters, vote_counts by candidate ID, unresolved votes)"""
+        voters = set()
+        registry = CandidateRegistry(self.genesis_candidates())
+        vote_counts = [0] * len(registry)
+        unresolved = 0
+        for block in self.chain[1:]:  # Skip genesis block
+            for vote in self.block_votes(block):
+                voters.add(vote.get('voter_id'))
+                candidate_id = registry.resolve(vote['vote'])
+                if candidate_id is None:
+                    unresolved += 1
+                else:
+                    vote_counts[candidate_id] += 1
+            if registry.apply(block.vote_data, block.index) is not None:
+                vote_counts.append(0)
+        return voters, vote_counts, unresolved
+    
+    def index_block(self, block):
+        """Update the tally, receipt and hash indexes for a block just appended (caller holds the lock)"""
+        self.block_hashes.add(block.hash, block.index)
+        for position, vote in enumerate(self.block_votes(block)):
+            self.voters.add(vote.get('voter_id'))
+            self.voter_blocks.add(voter_digest(vote.get('voter_id')), block.index)
+            # Name ballots (older chains) resolve against the names in effect at this point of the chain
+            candidate_id = self.candidate_registry.resolve(vote['vote'])
+            if candidate_id is None:
+                self.unresolved_votes += 1
+            else:
+                self.vote_counts[candidate_id] += 1
+            self.receipts.add(vote_receipt(vote), (block.index << self.RECEIPT_POSITION_BITS) | position)
+    
+    def unindex_block(self, block):
+        """Undo index_block for a block dropped from the tip (caller holds the lock).
+        
+        The voter set can't remove IDs, so the block's voters stay reserved; the caller
+        re-queues their votes.
+        """
+        self.block_hashes.discard(block.hash)
+        for vote in self.block_votes(block):
+            self.voter_blocks.discard(voter_digest(vote.get('voter_id')))
+            candidate_id = self.candidate_registry.resolve(vote['vote'])
+            if candidate_id is None:
+                self.unresolved_votes -= 1
+            else:
+                self.vote_counts[candidate_id] -= 1
+            self.receipts.discard(vote_receipt(vote))
+    
+    def get_inclusion_proof(self, receipt):
+        """Merkle path proving the vote with this receipt is in a sealed block, or None"""
+        location = self.receipts.get(receipt)
+        if location is None:
+            return None
+        block_index = location >> self.RECEIPT_POSITION_BITS
+        position = location & ((1 << self.RECEIPT_POSITION_BITS) - 1)
+        block = self.chain[block_index]
+        if not block.is_batch():
+            # Single-vote blocks hash the vote itself, not a root: return the header fields so the auditor can
+            # recompute sha256(f"{index}{timestamp}{vote_json}{previous_hash}{nonce}") == block_hash. The vote
+            # goes out as the exact JSON that was hashed, since the response re-serializes dicts with sorted keys
+            return {'block_index': block.index, 'block_hash': block.hash, 'timestamp': block.timestamp,
+                    'previous_hash': block.previous_hash, 'nonce': block.nonce,
+                    'vote_json': json.dumps(block.vote_data), 'path': []}
+        leaves = [vote_receipt(vote) for vote in block.vote_data['votes']]
+        return {
+            'block_index': block.index,
+            'block_hash': block.hash,
+            'merkle_root': block.merkle_root,
+            'leaf_count': len(leaves),
+            'path': merkle_proof(leaves, position)
+        }
+    
+    def apply_candidate_action(self, block):
+        """Replay an add/modify candidate block onto the candidate registry"""
+        if self.candidate_registry.apply(block.vote_data, block.index) is not None:
+            self.vote_counts.append(0)
+    
+    def rebuild_indexes(self):
+        """Rebuild voters, candidates and the tally index from the chain (startup / chain replacement)"""
+        self.voters = self.voter_registry()
+        self.candidate_registry = CandidateRegistry(self.genesis_candidates())
+        self.vote_counts = [0] * len(self.candidate_registry)
+        self.unresolved_votes = 0
+        self.receipts = DigestIndex()
+        self.block_hashes = DigestIndex()
+        self.voter_blocks = DigestIndex()
+        for block in self.chain:
+            self.index_block(block)
+            self.apply_candidate_action(block)
+        # Votes still waiting in the pool keep their voter reservation
+        self.voters.update(vote.get('voter_id') for vote in self.pending_transactions)
+    
+    def _truncate_locked(self, length):
+        """Drop blocks from `length` onwards, undoing only their index entries (caller holds the lock)"""
+        history_known = True
+        for index in range(len(self.chain) - 1, length - 1, -1):
+            self.unindex_block(self.chain[index])
+            history_known = self.candidate_registry.revert(index) and history_known
+            del self.vote_counts[len(self.candidate_registry):]
+        self.chain.truncate(length)
+        if not history_known:
+            self.rebuild_indexes()  # Registry restored from an older snapshot without its change history
+        # Blocks before the cut were already verified
+        if self.checkpoint[0] > length:
+            self.checkpoint = (length, self.chain[length - 1].hash)
+    
+    def _drop_sealed_pending(self):
+        """Forget pending votes whose voter already has a vote on the chain (caller holds the lock)"""
+        self.pending_transactions = [vote for vote in self.pending_transactions
+                                     if self.voter_blocks.get(voter_digest(vote.get('voter_id'))) is None]
+    
+    # -------------------------
+    # Node consensus
+    # -------------------------
+    
+    SYNC_BATCH = 500  # Blocks per /sync/blocks request
+    
+    def register_node(self, address):
+        """Add a peer by URL or host:port; returns False if the address can't be parsed"""
+        parsed = urlparse(address if '://' in address else f'http://{address}')
+        if not parsed.netloc:
+            return False
+        self.nodes.add(parsed.netloc)
+        return True
+    
+    def _session(self, node):
+        """One pooled keep-alive HTTP session per peer"""
+        session = self.sessions.get(node)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            if NODE_SYNC_TOKEN:
+                session.headers['X-Node-Token'] = NODE_SYNC_TOKEN
+            self.sessions[node] = session
+        return session
+    
+    def _peer_get(self, node, path, **params):
+        response = self._session(node).get(f'http://{node}{path}', params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    
+    def _peer_blocks(self, node, after, limit):
+        data = self._peer_get(node, '/sync/blocks', after=after, limit=limit)
+        return [Block.from_dict(block) for block in data['blocks']]
+    
+    def _common_ancestor(self, node, peer_length):
+        """Highest height where our block hash matches the peer's, or -1 if even genesis differs"""
+        high = min(len(self.chain), peer_length) - 1
+        peer_block = self._peer_blocks(node, high - 1, 1)
+        if peer_block and peer_block[0].hash == self.chain[high].hash:
+            return high  # Common case: the peer simply extends our chain
+        
+        # Hash links make matches monotone: if height i matches, so does everything below it
+        low, high, ancestor = 0, high - 1, -1
+        while low <= high:
+            mid = (low + high) // 2
+            peer_block = self._peer_blocks(node, mid - 1, 1)
+            if peer_block and peer_block[0].hash == self.chain[mid].hash:
+                ancestor, low = mid, mid + 1
+            else:
+                high = mid - 1
+        return ancestor
+    
+    def registry_at(self, height):
+        """Copy of the candidate registry as it stood after block `height`"""
+        with self.lock:
+            registry = copy.deepcopy(self.candidate_registry)
+            if registry.revert(height + 1):
+                return registry
+        # No change history (restored from an older snapshot): replay the chain
+        registry = CandidateRegistry(self.genesis_candidates())
+        for index in range(1, height + 1):
+            registry.apply(self.chain[index].vote_data, index)
+        return registry
+    
+    @staticmethod
+    def ballots_error(block, registry):
+        """Why a peer's block holds a ballot this node wouldn't accept from a voter, or None"""
+        votes = Blockchain.block_votes(block)
+        if not isinstance(votes, list):
+            return 'malformed ballot'
+        for vote in votes:
+            try:
+                if not isinstance(vote, dict) or normalize_vote(vote, registry) != vote:
+                    return 'malformed ballot'
+            except ValueError as invalid:
+                return f'invalid ballot: {invalid}'
+        return None
+    
+    def prefers(self, length, tip_hash):
+        """Whether a chain with this length and tip beats ours: longest wins, the lower tip hash breaks ties"""
+        return length > len(self.chain) or (length == len(self.chain) and tip_hash < self.get_latest_block().hash)
+    
+    def sync_from(self, node, peer_length=None, peer_tip=None):
+        """Adopt a peer's chain if it is preferred and valid, fetching only the missing suffix"""
+        if peer_length is None:
+            status = self._peer_get(node, '/sync/status')
+            peer_length, peer_tip = status['length'], status['tip_hash']
+        if not self.prefers(peer_length, peer_tip or ''):
+            return False
+        ancestor = self._common_ancestor(node, peer_length)
+        if ancestor < 0:
+            log_event(logging.WARNING, 'sync_rejected', node=node, index=0, reason='different genesis block')
+            return False
+        expected_tip = self.chain[ancestor].hash
+        registry = self.registry_at(ancestor)
+        difficulty = self.min_difficulty
+        
+        # Fetch the suffix in batches, validating each block before asking for more
+        suffix = []
+        seen_voters = set()
+        previous_hash = expected_tip
+        after = ancestor
+        while after < peer_length - 1:
+            batch = self._peer_blocks(node, after, self.SYNC_BATCH)
+            if not batch:
+                break
+            for block in batch:
+                if block.index != after + 1:
+                    log_event(logging.WARNING, 'sync_rejected', node=node, index=block.index, reason='out of order')
+                    return False
+                error = self.block_error(block, previous_hash, difficulty) or self.ballots_error(block, registry)
+                if error:
+                    log_event(logging.WARNING, 'sync_rejected', node=node, index=block.index, reason=error)
+                    return False
+                registry.apply(block.vote_data, block.index)
+                for vote in self.block_votes(block):
+                    voter_id = vote.get('voter_id')
+                    on_prefix = self.voter_blocks.get(voter_digest(voter_id))
+                    if voter_id in seen_voters or (on_prefix is not None and on_prefix <= ancestor):
+                        log_event(logging.WARNING, 'sync_rejected', node=node, index=block.index, reason='double vote')
+                        return False
+                    seen_voters.add(voter_id)
+                suffix.append(block)
+                previous_hash = block.hash
+                after = block.index
+        
+        with self.lock:
+            if ancestor >= len(self.chain) or self.chain[ancestor].hash != expected_tip:
+                return False  # Our prefix changed underneath us; the next resolve retries
+            # Skip blocks a concurrent sync already appended
+            shared = 0
+            while (shared < len(suffix) and suffix[shared].index < len(self.chain)
+                   and self.chain[suffix[shared].index].hash == suffix[shared].hash):
+                shared += 1
+            ancestor += shared
+            suffix = suffix[shared:]
+            if not suffix or not self.prefers(ancestor + 1 + len(suffix), suffix[-1].hash):
                 return False
+            if ancestor == len(self.chain) - 1:
+                for block in suffix:
+                    self.append_block(block)
+                self._drop_sealed_pending()
+                log_sampled(logging.INFO, 'blocks_synced', node=node, blocks=len(suffix), length=len(self.chain))
+                return True
             
-            # Verify chain linkage
-            if current_block.previous_hash != previous_block.hash:
-                return False
+            # Fork: cut back to the common ancestor and append the peer's suffix, re-queueing orphaned votes
+            orphaned_blocks = [self.chain[index] for index in range(ancestor + 1, len(self.chain))]
+            orphaned = [vote for block in orphaned_blocks for vote in self.block_votes(block)]
+            # Candidate IDs added on the orphaned blocks may mean someone else on the adopted chain
+            orphaned_ids = {block.vote_data.get('candidate_id') for block in orphaned_blocks
+                            if isinstance(block.vote_data, dict) and block.vote_data.get('action') == 'add_candidate'}
+            names = list(self.candidate_registry.names)
+            log_event(logging.INFO, 'chain_forked', node=node, ancestor=ancestor, dropped=len(orphaned_blocks),
+                      adopted=len(suffix), orphaned_votes=len(orphaned))
+            self._truncate_locked(ancestor + 1)
+            for block in suffix:
+                self.append_block(block)
+            self._drop_sealed_pending()
+            for vote in orphaned:
+                if type(vote.get('vote')) is int and vote['vote'] in orphaned_ids:
+                    candidate_id = self.candidate_registry.resolve(names[vote['vote']])
+                    if candidate_id is None:
+                        log_event(logging.WARNING, 'ballot_dropped', node=node, candidate=names[vote['vote']],
+                                  reason='candidate not on adopted chain')
+                        continue
+                    vote = dict(vote, vote=candidate_id)
+                if self.voter_blocks.get(voter_digest(vote.get('voter_id'))) is None:
+                    self.pending_transactions.append(vote)
+                    self.voters.add(vote.get('voter_id'))
+            if self.storage is not None:
+                # The journal may still hold dropped or remapped ballots from the orphaned blocks
+                self.storage.rewrite_pending(self.pending_transactions)
+            if not self.pending_transactions:
+                return True
+        self.flush_pending()  # Re-mine the orphaned votes on the new tip
+        return True
+    
+    def receive_block(self, node, block_hash, index):
+        """Fetch an announced block (and any gap before it) if it makes a preferred chain; True if adopted"""
+        if not self.prefers(index + 1, block_hash) or self.block_hashes.get(block_hash) is not None:
+            return False
+        return self.sync_from(node, peer_length=index + 1, peer_tip=block_hash)
+    
+    def resolve_conflicts(self):
+        """Longest-chain rule: sync from the best reachable peer; returns the node adopted or None"""
+        statuses = []
+        for node in list(self.nodes):
+            try:
+                status = self._peer_get(node, '/sync/status')
+                statuses.append((-status['length'], status['tip_hash'], node))
+            except (requests.RequestException, ValueError, KeyError) as error:
+                log_event(logging.WARNING, 'peer_unreachable', node=node, error=repr(error))
+                continue
+        for negative_length, tip_hash, node in sorted(statuses):
+            if not self.prefers(-negative_length, tip_hash):
+                break
+            try:
+                if self.sync_from(node, -negative_length, tip_hash):
+                    return node
+            except (requests.RequestException, ValueError, KeyError) as error:
+                log_event(logging.WARNING, 'sync_failed', node=node, error=repr(error))
+                continue
+        return None
+    
+    def get_block_by_hash(self, block_hash):
+        """Look up a block through the hash index; None if the hash isn't on the chain"""
+        index = self.block_hashes.get(block_hash)
+        return self.chain[index] if index is not None else None
+    
+    def get_vote_status(self, voter_id):
+        """'sealed', 'pending' or 'not_found' for a voter ID"""
+        if self.voter_blocks.get(voter_digest(voter_id)) is not None:
+            return 'sealed'
+        if voter_id in self.voters:
+            return 'pending'
+        return 'not_found'
+    
+    def get_vote_counts(self):
+        """Return votes per current candidate name in O(candidates) from the tally index"""
+        return dict(zip(self.candidate_registry.names, self.vote_counts))
+    
+    def get_total_votes(self):
+        return sum(self.get_vote_counts().values())
+    
+    def is_tally_consistent(self):
+        """Compare the tally index against a full rescan of the chain"""
+        _, vote_counts, unresolved = self.scan_votes()
+        return vote_counts == self.vote_counts and unresolved == self.unresolved_votes
+    
+    @staticmethod
+    def block_error(block, previous_hash, difficulty=MIN_DIFFICULTY):
+        """Why a block fails verification against its predecessor's hash, or None if it is valid"""
+        if block.is_batch():
+            votes = block.vote_data['votes']
+            if not isinstance(votes, list) or not all(isinstance(vote, dict) for vote in votes):
+                return 'malformed batch'
+            # A repeated vote would still match the root, since odd tree levels duplicate their last node
+            if len({str(vote.get('voter_id')) for vote in votes}) != len(votes):
+                return 'duplicate voter in block'
+        elif block.merkle_root is not None:
+            return 'merkle root mismatch'
+        
+        # Verify current block hash
+        if block.hash != block.calculate_hash():
+            return 'hash mismatch'
+        
+        # Verify the proof of work meets the chain's minimum
+        if not block.hash.startswith('0' * difficulty):
+            return 'insufficient proof of work'
         
+        # Verify the Merkle root still matches the votes it commits to
+        if block.is_batch() and block.merkle_root != block.compute_merkle_root():
+            return 'merkle root mismatch'
+        
+        # Verify chain linkage
+        if block.previous_hash != previous_hash:
+            return 'broken link to previous block'
+        return None
+    
+    def find_invalid_block(self, length=None, progress=None, start=1):
+        """Serial re-verification from `start` (the whole chain by default); returns (first invalid index, reason) or None"""
+        length = len(self.chain) if length is None else length
+        previous_hash = self.chain[start - 1].hash
+        difficulty = self.min_difficulty
+        for i in range(start, length):
+            current_block = self.chain[i]
+            error = self.block_error(current_block, previous_hash, difficulty)
+            if error:
+                return i, error
+            previous_hash = current_block.hash
+            if progress and i % 1000 == 0:
+                progress(i)
+        return None
+    
+    def is_chain_valid(self):
+        """Full re-verification of every block; prefer verify_incremental on request paths"""
+        return self.find_invalid_block() is None
+    
+    def verify_incremental(self):
+        """Verify only blocks added since the trusted checkpoint, then advance it"""
+        with self.verify_lock:
+            height, length = self.unverified_range()
+            previous_hash = self.chain[height - 1].hash
+            difficulty = self.min_difficulty
+            for index in range(height, length):
+                block = self.chain[index]
+                error = self.block_error(block, previous_hash, difficulty)
+                if error:
+                    return self.record_verified(length, (index, error))
+                previous_hash = block.hash
+            return self.record_verified(length, None)
+    
+    def unverified_range(self):
+        """(first block past the trusted checkpoint, chain length) (caller holds verify_lock)"""
+        height, tip_hash = self.checkpoint
+        length = len(self.chain)
+        if height > length or self.chain[height - 1].hash != tip_hash:
+            # Chain was replaced or truncated under the checkpoint: start over from genesis
+            height = 1
+        return height, length
+    
+    def record_verified(self, length, failure):
+        """Advance the checkpoint to `length`, or to the block before `failure`; True if valid (caller holds verify_lock)"""
+        height = failure[0] if failure else length
+        self.checkpoint = (height, self.chain[height - 1].hash)
+        return failure is None
+    
+    def start_full_verification(self, workers=1):
+        """Kick off a background re-verification of the whole chain; False if one is running"""
+        with self.verify_lock:
+            if self.verification_job.get('state') == 'running':
+                return False
+            self.verification_job = {'state': 'running', 'checked': 0, 'total': len(self.chain) - 1,
+                                     'workers': workers, 'started': time.time()}
+        thread = threading.Thread(target=self._run_full_verification, args=(self.verification_job, workers), daemon=True)
+        thread.start()
         return True
     
+    def _run_full_verification(self, job, workers):
+        length = job['total'] + 1
+        progress = lambda checked: job.update(checked=checked)
+        if workers > 1:
+            failure = verify_chain_parallel(self.chain, workers, length=length, progress=progress,
+                                            difficulty=self.min_difficulty)
+        else:
+            failure = self.find_invalid_block(length, progress)
+        
+        if failure:
+            with self.verify_lock:
+                # The trusted prefix is compromised, so incremental checks must start over
+                self.checkpoint = (1, self.chain[0].hash)
+            job.update(state='failed', valid=False, invalid_index=failure[0], reason=failure[1], finished=time.time())
+            return
+        
+        with self.verify_lock:
+            self.checkpoint = (length, self.chain[length - 1].hash)
+        job.update(state='done', valid=True, checked=length - 1, tally_consistent=self.is_tally_consistent(),
+                   finished=time.time())
+    
     def add_vote(self, vote_data):
         voter_id = vote_data.get('voter_id')
         if voter_id in self.voters:
+            return False  # Lock-free fast path for repeat voters
+        
+        with timed_lock(self.lock, 'chain', 'add_vote'):
+            # Check and reserve atomically; the lock is never held while mining, so this stays short
+            if voter_id in self.voters:
+                return False
+            self.voters.add(voter_id)
+            inline = self.batch_size <= 1 and not self.seal_in_background
+            seal_now = self._queue_pending(vote_data, journal=not inline)
+            log_sampled(logging.DEBUG, 'vote_queued', pending=len(self.pending_transactions), inline=inline)
+            if self.gossip is not None and not inline:
+                self.gossip.announce('vote', vote_receipt(vote_data))
+            if seal_now and self.seal_in_background:
+                if not self.seal_scheduled:
+                    self.seal_scheduled = True
+                    self.sealer.submit(self._seal_scheduled)
+                seal_now = False
+        
+        if seal_now:
+            # Concurrent voters queue behind this and are sealed together in the next block
+            self.flush_pending()
+        return True
+    
+    def add_votes(self, votes):
+        """Validate, dedupe and reserve a batch under one lock acquisition, then seal it.
+        
+        Returns a (status, reason) pair per vote: 'accepted', 'duplicate' or 'invalid'.
+        """
+        results = []
+        with timed_lock(self.lock, 'chain', 'add_votes'):
+            for vote_data in votes:
+                if self.candidate_registry.resolve(vote_data['vote']) is None:
+                    results.append(('invalid', 'unknown candidate'))
+                elif vote_data['voter_id'] in self.voters:
+                    results.append(('duplicate', 'voter has already voted'))
+                else:
+                    self.voters.add(vote_data['voter_id'])
+                    self.pending_transactions.append(vote_data)
+                    results.append(('accepted', None))
+        # Sealed before returning, so nothing needs the pending journal
+        self.flush_pending()
+        return results
+    
+    def _queue_pending(self, vote_data, journal=True):
+        """Add a vote to pending_transactions; True once the batch is full (caller holds the lock)"""
+        self.pending_transactions.append(vote_data)
+        if journal and self.storage is not None:
+            self.storage.append_pending(vote_data)
+        if len(self.pending_transactions) >= self.batch_size:
+            return True
+        if self.batch_timer is None:
+            self.batch_timer = threading.Timer(self.batch_timeout, self.flush_pending)
+            self.batch_timer.daemon = True
+            self.batch_timer.start()
+        return False
+    
+    def _seal_scheduled(self):
+        # Sealer thread; votes queued from here on schedule the next block
+        with self.lock:
+            self.seal_scheduled = False
+        self.flush_pending()
+    
+    def accept_peer_vote(self, vote_data):
+        """Hold a vote gossiped by a peer until the peer's block arrives; False if the voter is known or the vote is invalid"""
+        # Same checks as a local vote: a ballot that isn't a current candidate ID would break index_block when sealed
+        try:
+            if normalize_vote(vote_data, self.candidate_registry) != vote_data:
+                return False
+        except ValueError:
             return False
-        
         with self.lock:
-            self.voters.add(voter_id)
-            new_block = Block(len(self.chain), time.time(), vote_data)
-            new_block.previous_hash = self.get_latest_block().hash
-            new_block.hash = new_block.mine_block(1)  # Always use difficulty 1 for voting
-            self.chain.append(new_block)
+            if vote_data.get('voter_id') in self.voters:
+                return False
+            self.voters.add(vote_data.get('voter_id'))
+            # Don't mine it straight away: the origin is already sealing it, and racing it forks the chain.
+            # The batch timer still seals it here if the origin's block never shows up.
+            self.pending_transactions.append(vote_data)
+            if self.batch_timer is None:
+                self.batch_timer = threading.Timer(self.batch_timeout, self.flush_pending)
+                self.batch_timer.daemon = True
+                self.batch_timer.start()
+            return True
+    
+    def find_vote(self, receipt):
+        """Pending or sealed vote with this receipt, or None"""
+        with self.lock:
+            for vote in self.pending_transactions:
+                if vote_receipt(vote) == receipt:
+                    return vote
+        location = self.receipts.get(receipt)
+        if location is None:
+            return None
+        block = self.chain[location >> self.RECEIPT_POSITION_BITS]
+        return self.block_votes(block)[location & ((1 << self.RECEIPT_POSITION_BITS) - 1)]
+    
+    def announce_block(self, block):
+        if self.gossip is not None:
+            self.gossip.announce('block', block.hash, index=block.index)
+    
+    def flush_pending(self):
+        """Seal any pending votes into a block now, regardless of batch size"""
+        def build():
+            if self.batch_timer is not None:
+                self.batch_timer.cancel()
+                self.batch_timer = None
+            votes = list(self.pending_transactions)
+            if not votes:
+                return None
+            # A lone vote outside batching mode keeps the single-vote block format
+            vote_data = votes[0] if len(votes) == 1 and self.batch_size <= 1 else {"votes": votes}
+            return Block(len(self.chain), time.time(), vote_data, self.get_latest_block().hash)
+        
+        def commit(block):
+            votes = self.block_votes(block)
+            sealed = self.pending_transactions[:len(votes)]
+            if len(sealed) != len(votes) or any(queued is not vote for queued, vote in zip(sealed, votes)):
+                return False  # A sync dropped some of these votes while we mined
+            self.pending_transactions = self.pending_transactions[len(votes):]
+            self.append_block(block)
+            if self.storage is not None:
+                self.storage.trim_pending(self.pending_transactions)
             return True
+        
+        return self.mine_and_commit(build, commit)
     
     def add_candidate(self, candidate_name):
-        """Add a new candidate to the election"""
-        if candidate_name in self.candidates:
+        """Add a new candidate to the election under the next candidate ID"""
+        if candidate_name in self.candidate_registry:
             return False
         
-        with self.lock:
-            self.candidates.append(candidate_name)
-            # Record this action in the blockchain for transparency
+        # Record this action in the blockchain for transparency
+        def build():
+            if candidate_name in self.candidate_registry:
+                return None  # Added concurrently
             action_data = {
                 "action": "add_candidate",
+                "candidate_id": len(self.candidate_registry),
                 "candidate": candidate_name,
                 "timestamp": time.time()
             }
-            new_block = Block(len(self.chain), time.time(), action_data)
-            new_block.previous_hash = self.get_latest_block().hash
-            new_block.hash = new_block.mine_block(1)  # Always use difficulty 1 for admin operations
-            self.chain.append(new_block)
+            return Block(len(self.chain), time.time(), action_data, self.get_latest_block().hash)
+        def commit(block):
+            if candidate_name in self.candidate_registry or len(self.candidate_registry) != block.vote_data['candidate_id']:
+                return False  # The name or the ID was taken while we mined
+            self.append_block(block)  # Adds the candidate
             return True
+        return self.mine_and_commit(build, commit) is not None
     
     def modify_candidate(self, old_name, new_name):
-        """Modify an existing candidate's name"""
-        if old_name not in self.candidates:
+        """Rename a candidate; ballots record the candidate ID, so existing votes follow the new name"""
+        candidate_id = self.candidate_registry.resolve(old_name)
+        if candidate_id is None or new_name in self.candidate_registry:
             return False
         
-        with self.lock:
-            index = self.candidates.index(old_name)
-            self.candidates[index] = new_name
-            # Record this action in the blockchain for transparency
-            action_data = {
-                "action": "modify_candidate",
-                "old_name": old_name,
-                "new_name": new_name,
-                "timestamp": time.time()
-            }
-            new_block = Block(len(self.chain), time.time(), action_data)
-            new_block.previous_hash = self.get_latest_block().hash
-            new_block.hash = new_block.mine_block(1)  # Always use difficulty 1 for admin operations
-            self.chain.append(new_block)
+        # Record this action in the blockchain for transparency
+        action_data = {
+            "action": "modify_candidate",
+            "candidate_id": candidate_id,
+            "old_name": old_name,
+            "new_name": new_name,
+            "timestamp": time.time()
+        }
+        def build():
+            if self.candidate_registry.names[candidate_id] != old_name or new_name in self.candidate_registry:
+                return None  # Renamed concurrently
+            return Block(len(self.chain), time.time(), action_data, self.get_latest_block().hash)
+        def commit(block):
+            if self.candidate_registry.names[candidate_id] != old_name or new_name in self.candidate_registry:
+                return False
+            self.append_block(block)  # Renames the candidate
+            return True
+        return self.mine_and_commit(build, commit) is not None
+
+# -------------------------
+# Gossip
+# -------------------------
+
+class GossipRelay:
+    """Push-based propagation: announce new vote receipts and block hashes to a few random peers.
+    
+    Announcements carry only an id; a peer that hasn't seen it fetches the object from the origin
+    and re-announces it. Sends and fetches run on a small thread pool behind a bounded number of
+    slots, so a slow peer drops announcements instead of slowing down /vote.
+    """
+    
+    def __init__(self, chain, address, fanout=3, max_queued=256, workers=4, seen_limit=100000):
+        self.chain = chain
+        self.address = address  # host:port peers use to fetch from us
+        self.fanout = fanout
+        self.seen_limit = seen_limit
+        self.seen = OrderedDict()  # Ids already announced or received, oldest first
+        self.seen_lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max_queued)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gossip')
+        self.dropped = 0
+    
+    def mark_seen(self, object_id):
+        """Record an id; False if it was already seen"""
+        with self.seen_lock:
+            if object_id in self.seen:
+                self.seen.move_to_end(object_id)
+                return False
+            self.seen[object_id] = True
+            if len(self.seen) > self.seen_limit:
+                self.seen.popitem(last=False)
             return True
+    
+    def submit(self, function, *args):
+        """Run function on the pool if a slot is free, otherwise drop it"""
+        if not self.slots.acquire(blocking=False):
+            self.dropped += 1
+            return False
+        future = self.executor.submit(function, *args)
+        future.add_done_callback(lambda _: self.slots.release())
+        return True
+    
+    def announce(self, kind, object_id, **fields):
+        """Announce a vote receipt or block hash created here"""
+        if self.mark_seen(object_id):
+            self.fan_out({'type': kind, 'id': object_id, **fields})
+    
+    def fan_out(self, message, exclude=None):
+        peers = [node for node in self.chain.nodes if node != exclude]
+        message = dict(message, origin=self.address)
+        for node in random.sample(peers, min(self.fanout, len(peers))):
+            self.submit(self._send, node, message)
+    
+    def _send(self, node, message):
+        try:
+            self.chain._session(node).post(f'http://{node}/gossip', json=message, timeout=5)
+        except requests.RequestException as error:
+            # Gossip is best effort; /nodes/resolve repairs anything missed
+            log_sampled(logging.DEBUG, 'gossip_send_failed', node=node, error=repr(error))
+    
+    def receive(self, message):
+        """Handle an announcement from a registered peer; False if it was a duplicate, malformed or unsolicited"""
+        if message.get('type') not in ('vote', 'block') or not isinstance(message.get('id'), str):
+            return False
+        # Only fetch from peers registered here, never from whatever host a message names. This relies on
+        # /gossip and /nodes/register both requiring the node token (or, for register, the admin login):
+        # otherwise anyone could register a host and then point announcements at it
+        if not isinstance(message.get('origin'), str) or message['origin'] not in self.chain.nodes:
+            return False
+        if not self.mark_seen(message['id']):
+            return False
+        return self.submit(self._handle, message)
+    
+    def _handle(self, message):
+        origin = message['origin']
+        try:
+            if message['type'] == 'block':
+                accepted = self.chain.receive_block(origin, message['id'], int(message.get('index', 0)))
+            else:
+                accepted = self._receive_vote(origin, message['id'])
+        except (requests.RequestException, ValueError, KeyError, TypeError) as error:
+            log_sampled(logging.DEBUG, 'gossip_fetch_failed', node=origin, kind=message['type'], error=repr(error))
+            return
+        if accepted:
+            self.fan_out(message, exclude=origin)
+    
+    def _receive_vote(self, origin, receipt):
+        if self.chain.receipts.get(receipt) is not None:
+            return False
+        vote = self.chain._peer_get(origin, f'/gossip/votes/{receipt}')
+        if not isinstance(vote, dict) or vote_receipt(vote) != receipt:
+            return False
+        return self.chain.accept_peer_vote(vote)
+    
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+# -------------------------
+# Parallel Chain Verification
+# -------------------------
+
+_verify_sources = []  # Chains inherited by forked verification workers
+
+def _read_inherited_block(source, index):
+    chain = _verify_sources[source]
+    if isinstance(chain, StoredChain):
+        # Skip the store lock: another parent thread may have held it at fork time
+        store = chain.store
+        return store._read_at(store.segment_ids[index], store.offsets[index])
+    return chain[index]
+
+def _verify_shard(start, end, previous_hash, blocks=None, difficulty=MIN_DIFFICULTY, source=0):
+    """Worker: first (index, reason) that fails in [start, end) of chain `source`, or None"""
+    for offset, index in enumerate(range(start, end)):
+        block = Block.from_dict(blocks[offset]) if blocks is not None else _read_inherited_block(source, index)
+        error = Blockchain.block_error(block, previous_hash, difficulty)
+        if error:
+            return index, error
+        previous_hash = block.hash
+    return None
+
+def verify_chain_parallel(chain, workers=None, shard_size=10000, length=None, progress=None, difficulty=MIN_DIFFICULTY):
+    """Re-hash the chain in shards across a process pool; returns (first invalid index, reason) or None"""
+    length = len(chain) if length is None else length
+    return verify_ranges_parallel([(chain, 1, length, difficulty)], workers, shard_size, progress)[0]
+
+def verify_ranges_parallel(ranges, workers=None, shard_size=10000, progress=None):
+    """Re-hash (chain, start, stop, difficulty) ranges across one process pool; per range, the first failure or None.
+    
+    Each shard is seeded with the stored hash of the block before it, so the
+    previous_hash links at shard boundaries are checked too. With the fork
+    start method workers read the inherited chains directly and only index
+    ranges cross the process boundary; elsewhere shards are shipped as dicts.
+    """
+    global _verify_sources
+    shards = sum(len(range(start, stop, shard_size)) for _, start, stop, _ in ranges)
+    workers = max(1, min(workers or os.cpu_count() or 1, shards))
+    for chain, _, _, _ in ranges:
+        if isinstance(chain, StoredChain):
+            chain.store.sync()  # Forked workers read records from disk
+    inherit = 'fork' in multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork') if inherit else multiprocessing.get_context()
+    
+    _verify_sources = [chain for chain, _, _, _ in ranges]
+    failures = [[] for _ in ranges]
+    checked = 0
+    try:
+        with context.Pool(workers) as pool:
+            in_flight = []
+            
+            def collect():
+                nonlocal checked
+                size, source, result = in_flight.pop(0)
+                failure = result.get()
+                if failure:
+                    failures[source].append(failure)
+                checked += size
+                if progress:
+                    progress(checked)
+            
+            for source, (chain, first, stop, difficulty) in enumerate(ranges):
+                for start in range(first, stop, shard_size):
+                    if failures[source] and start > min(failures[source])[0]:
+                        break  # Later shards can't hold the first invalid block
+                    end = min(start + shard_size, stop)
+                    blocks = None if inherit else [chain[i].to_dict() for i in range(start, end)]
+                    args = (start, end, chain[start - 1].hash, blocks, difficulty, source)
+                    in_flight.append((end - start, source, pool.apply_async(_verify_shard, args)))
+                    if len(in_flight) >= workers * 2:
+                        collect()
+            while in_flight:
+                collect()
+    finally:
+        _verify_sources = []
+    return [min(found) if found else None for found in failures]
+
+# -------------------------
+# Elections
+# -------------------------
+
+ELECTION_ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+RESERVED_ELECTION_IDS = {'verify'}  # Would shadow the /elections/verify route
+
+class ElectionRegistry:
+    """Election ID -> the Blockchain shard holding that election's votes.
+    
+    Each election (or each contest on a multi-contest ballot) is a separate chain with its own lock,
+    voter registry, tally, sealer thread and mining pool, so votes in independent contests never
+    wait on each other and their blocks are mined in parallel. An election's ID, title and
+    starting candidates are recorded in its genesis block. The node's original chain is the
+    'default' election.
+    """
+    
+    def __init__(self, default_chain, data_dir=None):
+        self.default = default_chain
+        self.data_dir = data_dir  # Shards persist under <data_dir>/elections/<election ID>
+        self.shards = {'default': default_chain}
+        self.lock = threading.Lock()  # Guards the shard map only; each shard has its own chain lock
+    
+    def __contains__(self, election_id):
+        return election_id in self.shards
+    
+    def get(self, election_id):
+        return self.shards.get(election_id)
+    
+    def items(self):
+        """(election ID, chain) pairs sorted by ID"""
+        with self.lock:
+            return sorted(self.shards.items())
+    
+    def _new_shard(self, election_id, election=None):
+        storage = ChainStore(os.path.join(self.data_dir, 'elections', election_id)) if self.data_dir else None
+        chain = Blockchain(storage=storage, election=election)
+        # New shards start with the default chain's settings. Each keeps its own mining pool (started on
+        # first use): a shared pool searches one nonce at a time and would serialize the shards' sealers
+        chain.difficulty = self.default.difficulty
+        chain.batch_size = self.default.batch_size
+        chain.batch_timeout = self.default.batch_timeout
+        chain.seal_in_background = self.default.seal_in_background
+        return chain
+    
+    def load(self):
+        """Reopen the election shards stored under data_dir"""
+        directory = os.path.join(self.data_dir, 'elections') if self.data_dir else None
+        if directory is None or not os.path.isdir(directory):
+            return
+        for election_id in sorted(os.listdir(directory)):
+            if ELECTION_ID_PATTERN.match(election_id) and election_id not in self.shards:
+                self.shards[election_id] = self._new_shard(election_id)
+    
+    def create(self, election_id, title, candidates):
+        """Start a new election shard; raises ValueError if the ID or candidate list is unusable"""
+        if not isinstance(election_id, str) or not ELECTION_ID_PATTERN.match(election_id) \
+                or election_id in RESERVED_ELECTION_IDS:
+            raise ValueError('election ID must be 1-64 lowercase letters, digits, "-" or "_"')
+        if not isinstance(candidates, list) or not candidates \
+                or not all(isinstance(name, str) and name.strip() for name in candidates):
+            raise ValueError('candidates must be a non-empty list of names')
+        candidates = [name.strip() for name in candidates]
+        if len(set(candidates)) != len(candidates):
+            raise ValueError('candidate names must be unique')
+        with self.lock:
+            if election_id in self.shards:
+                raise ValueError(f'election "{election_id}" already exists')
+            chain = self._new_shard(election_id, {'election': election_id, 'title': str(title or election_id),
+                                                  'candidates': candidates})
+            self.shards[election_id] = chain
+        log_event(logging.INFO, 'election_created', election=election_id, candidates=len(candidates))
+        return chain
+    
+    @staticmethod
+    def shard_leaf(election_id, chain):
+        """Leaf of the cross-shard root: commits to one shard's length and tip hash"""
+        with chain.lock:
+            length, tip_hash = len(chain.chain), chain.get_latest_block().hash
+        leaf = hashlib.sha256(json.dumps({'election': election_id, 'length': length, 'tip_hash': tip_hash},
+                                         sort_keys=True).encode()).hexdigest()
+        return {'election': election_id, 'length': length, 'tip_hash': tip_hash, 'leaf': leaf}
+    
+    def root(self):
+        """Merkle root over every shard's leaf, in election ID order, plus the leaves to recompute it.
+        
+        Each shard's tip is read under its own lock, so the root commits to the shards as they were
+        while it was being computed; an auditor holding it can check any shard with merkle_proof.
+        """
+        shards = [self.shard_leaf(election_id, chain) for election_id, chain in self.items()]
+        return {'root': merkle_root([shard['leaf'] for shard in shards]), 'shards': shards}
+    
+    PARALLEL_VERIFY_MIN = 2000  # Unverified blocks below which hashing in this process beats starting a pool
+    
+    def verify_all(self, workers=None):
+        """Incrementally verify every shard; election ID -> (valid, verified height).
+        
+        Shards' unverified blocks are hashed together in one process pool (threads would be
+        serialized by the GIL), each shard past its own trusted checkpoint.
+        """
+        items = self.items()
+        with contextlib.ExitStack() as stack:
+            for _, chain in items:
+                stack.enter_context(chain.verify_lock)  # Always taken in election ID order
+            spans = [chain.unverified_range() for _, chain in items]
+            pending = [(chain, start, length) for (_, chain), (start, length) in zip(items, spans) if start < length]
+            if sum(length - start for _, start, length in pending) >= self.PARALLEL_VERIFY_MIN:
+                failures = iter(verify_ranges_parallel([(chain.chain, start, length, chain.min_difficulty)
+                                                        for chain, start, length in pending], workers))
+            else:
+                failures = iter([chain.find_invalid_block(length, start=start) for chain, start, length in pending])
+            results = {}
+            for (election_id, chain), (start, length) in zip(items, spans):
+                valid = chain.record_verified(length, next(failures) if start < length else None)
+                results[election_id] = (valid, chain.checkpoint[0])
+            return results
+
+# Create blockchain instance; set CHAIN_DATA_DIR to persist blocks across restarts
+CHAIN_DATA_DIR = os.environ.get("CHAIN_DATA_DIR")
+configure_logging()
+voting_chain = Blockchain(storage=ChainStore(CHAIN_DATA_DIR) if CHAIN_DATA_DIR else None)
+# Answer vote submissions once the vote is queued (and journaled); SEAL_IN_BACKGROUND=0 mines inline
+voting_chain.seal_in_background = os.environ.get("SEAL_IN_BACKGROUND", "1") != "0"
+
+# Address peers use to fetch gossiped votes and blocks from this node
+NODE_ADDRESS = os.environ.get("NODE_ADDRESS") or f"127.0.0.1:{os.environ.get('PORT', 5000)}"
+voting_chain.gossip = GossipRelay(voting_chain, NODE_ADDRESS)
+
+# Further elections each get their own chain shard; voting_chain is the 'default' election
+elections = ElectionRegistry(voting_chain, CHAIN_DATA_DIR)
+elections.load()
 
-# Create blockchain instance
-voting_chain = Blockchain()
+@atexit.register
+def shutdown_chain():
+    # Seal queued votes and fsync the log of every election before the process exits
+    for _, chain in elections.items():
+        chain.flush_pending()
+        chain.sealer.shutdown(wait=False)
+        if chain.parallel_miner is not None:
+            chain.parallel_miner.close()
+        if chain.gossip is not None:
+            chain.gossip.close()
+        if chain.storage is not None:
+            chain.storage.close()
 
 # Create Flask app with secret key for flash messages
 app = Flask(__name__)
@@ -281,42 +2635,33 @@ body {
 
 # Navbar template
 NAVBAR_TEMPLATE = '''
-<nav class="navbar navbar-expand-lg navbar-dark">
+<nav class="navbar navbar-expand-lg navbar-dark mb-4">
     <div class="container">
-        <a class="navbar-brand" href="/">
-            <i class="fas fa-link me-2"></i> Blockchain Voting
-        </a>
+        <a class="navbar-brand" href="/"><i class="fas fa-vote-yea me-2"></i>Blockchain Voting</a>
         <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
             <span class="navbar-toggler-icon"></span>
         </button>
         <div class="collapse navbar-collapse" id="navbarNav">
-            <ul class="navbar-nav ms-auto">
+            <ul class="navbar-nav me-auto">
                 <li class="nav-item">
-                    <a class="nav-link {% if active_page == 'home' %}active{% endif %}" href="/">
-                        <i class="fas fa-home me-1"></i> Home
-                    </a>
+                    <a class="nav-link {{ 'active' if active_page == 'home' }}" href="/"><i class="fas fa-home me-1"></i> Home</a>
                 </li>
                 <li class="nav-item">
-                    <a class="nav-link {% if active_page == 'results' %}active{% endif %}" href="/results">
-                        <i class="fas fa-chart-pie me-1"></i> Results
-                    </a>
+                    <a class="nav-link {{ 'active' if active_page == 'results' }}" href="/results"><i class="fas fa-chart-pie me-1"></i> Results</a>
                 </li>
                 <li class="nav-item">
-                    <a class="nav-link {% if active_page == 'chain' %}active{% endif %}" href="/chain">
-                        <i class="fas fa-link me-1"></i> Blockchain
-                    </a>
+                    <a class="nav-link {{ 'active' if active_page == 'chain' }}" href="/chain"><i class="fas fa-link me-1"></i> Blockchain</a>
                 </li>
                 <li class="nav-item">
-                    <a class="nav-link {% if active_page == 'candidates' %}active{% endif %}" href="/candidates">
-                        <i class="fas fa-users me-1"></i> Candidates
-                    </a>
+                    <a class="nav-link {{ 'active' if active_page == 'candidates' }}" href="/candidates"><i class="fas fa-users-cog me-1"></i> Candidates</a>
                 </li>
                 <li class="nav-item">
-                    <a class="nav-link {% if active_page == 'analysis' %}active{% endif %}" href="/analysis">
-                        <i class="fas fa-shield-alt me-1"></i> Security
-                    </a>
+                    <a class="nav-link {{ 'active' if active_page == 'analysis' }}" href="/analysis"><i class="fas fa-chart-line me-1"></i> Analysis</a>
                 </li>
             </ul>
+            <div class="theme-toggle" id="theme-toggle" title="Toggle Dark Mode">
+                <i class="fas fa-moon"></i>
+            </div>
         </div>
     </div>
 </nav>
@@ -324,21 +2669,24 @@ NAVBAR_TEMPLATE = '''
 
 # Common JavaScript for dark mode
 DARK_MODE_JS = '''
-<script>
-    // Dark mode functionality
-    const themeToggle = document.getElementById('theme-toggle');
-    const body = document.body;
-    const cards = document.querySelectorAll('.card');
-    const icon = themeToggle.querySelector('i');
-    
-    // Check for saved theme preference
-    if (localStorage.getItem('darkMode') === 'true') {
-        body.classList.add('dark-mode');
-        cards.forEach(card => card.classList.add('dark-mode'));
+// Dark mode functionality
+const themeToggle = document.getElementById('theme-toggle');
+const body = document.body;
+const cards = document.querySelectorAll('.card');
+const icon = themeToggle ? themeToggle.querySelector('i') : null;
+
+// Check for saved theme preference
+if (localStorage.getItem('darkMode') === 'true') {
+    body.classList.add('dark-mode');
+    cards.forEach(card => card.classList.add('dark-mode'));
+    if (icon) {
         icon.classList.remove('fa-moon');
         icon.classList.add('fa-sun');
     }
+}
 
+// Not every page has a toggle in its navbar
+if (themeToggle) {
     themeToggle.addEventListener('click', () => {
         body.classList.toggle('dark-mode');
         cards.forEach(card => card.classList.toggle('dark-mode'));
@@ -354,11 +2702,28 @@ DARK_MODE_JS = '''
             icon.classList.add('fa-moon');
         }
     });
-</script>
+}
 '''
 
+# The shared CSS and JS are served from /assets/ with a content hash in the URL, so browsers cache them
+# for good and fetch again only when they change
+STATIC_ASSETS = {
+    'base.css': ('text/css', BASE_CSS.encode()),
+    'dark-mode.js': ('text/javascript', DARK_MODE_JS.encode()),
+}
+ASSET_VERSIONS = {name: hashlib.sha256(body).hexdigest()[:12] for name, (_, body) in STATIC_ASSETS.items()}
+
+@app.template_global()
+def asset_url(name):
+    return url_for('static_asset', name=name, v=ASSET_VERSIONS[name])
+
+# Page templates by name, served through a real loader so Jinja compiles each one once and caches it
+# (render_template_string recompiled the whole page on every request)
+PAGE_TEMPLATES = {'navbar.html': NAVBAR_TEMPLATE}
+app.jinja_loader = DictLoader(PAGE_TEMPLATES)
+
 # HTML Template for the home page
-HTML_TEMPLATE = '''
+PAGE_TEMPLATES['home.html'] = '''
 <!doctype html>
 <html lang="en">
 <head>
@@ -367,8 +2732,8 @@ HTML_TEMPLATE = '''
     <meta name="viewport" content="width=device-width, initial-scale=1">
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
     <style>
-        ''' + BASE_CSS + '''
         .voting-card {
             max-width: 650px;
             margin: auto;
@@ -385,7 +2750,7 @@ HTML_TEMPLATE = '''
     </style>
 </head>
 <body>
-''' + NAVBAR_TEMPLATE.replace('{{ active_page }}', 'home') + '''
+{% set active_page = 'home' %}{% include 'navbar.html' %}
 
     <div class="card shadow-lg p-5 bg-white voting-card">
         <span class="status-badge">Blockchain Secured</span>
@@ -405,7 +2770,7 @@ HTML_TEMPLATE = '''
                 <select class="form-select" name="vote" required>
                     <option value="" disabled selected>Select a candidate</option>
                     {% for candidate in candidates %}
-                    <option value="{{ candidate }}">{{ candidate }}</option>
+                    <option value="{{ loop.index0 }}">{{ candidate }}</option>
                     {% endfor %}
                 </select>
                 <div class="invalid-feedback">Please select a candidate.</div>
@@ -437,7 +2802,7 @@ HTML_TEMPLATE = '''
     </div>
 
 <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-''' + DARK_MODE_JS + '''
+<script src="{{ asset_url('dark-mode.js') }}"></script>
 <script>
     // Form validation
     (function() {
@@ -499,10 +2864,112 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+# -------------------------
+# Page Cache
+# -------------------------
+
+class PageCache:
+    """LRU of rendered pages for one chain generation: the tip hash plus the candidates version.
+    
+    A lookup under a newer generation empties the cache, so appending a block or changing candidates
+    invalidates every page without the chain having to know the cache exists.
+    """
+    
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # Request path -> page bytes, least recently used first
+        self.size = 0
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, generation, key):
+        with self.lock:
+            if generation != self.generation:
+                self.entries.clear()
+                self.size = 0
+                self.generation = generation
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+    
+    def put(self, generation, key, body):
+        with self.lock:
+            if generation != self.generation or len(body) > self.max_bytes:
+                return  # Rendered for a chain that has since moved on, or too big to keep
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = body
+            self.size += len(body)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+page_cache = PageCache()
+PAGE_CACHE_MAX_BLOCKS = 1000  # Larger /chain pages are streamed rather than cached
+
+@functools.cache
+def templates_version():
+    """Hash of the page templates and assets, so a redeploy changes every ETag"""
+    digest = hashlib.sha256()
+    for name in sorted(PAGE_TEMPLATES):
+        digest.update(PAGE_TEMPLATES[name].encode())
+    digest.update(json.dumps(ASSET_VERSIONS, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def cached_page(render, cacheable=True):
+    """HTML response for `render()`, served from the page cache and revalidated by ETag.
+    
+    The generation is read before rendering, so a block appended mid-render can only leave a page
+    that is already out of date under the old key, never a stale page under the new one. There is
+    no Last-Modified: at whole-second precision, If-Modified-Since would answer 304 for a page whose
+    chain gained a block later in the same second.
+    """
+    tip = voting_chain.get_latest_block()
+    generation = (tip.hash, voting_chain.candidates_version)
+    key = request.full_path
+    etag = hashlib.sha256(f'{tip.hash}:{generation[1]}:{key}:{templates_version()}'.encode()).hexdigest()[:32]
+    if not is_resource_modified(request.environ, etag=etag):
+        response = app.response_class(status=304)
+    else:
+        body = page_cache.get(generation, key) if cacheable else None
+        if body is None:
+            body = render()
+            if cacheable:
+                body = body.encode()
+                page_cache.put(generation, key, body)
+        response = app.response_class(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True  # Browsers and CDNs may keep a copy but must revalidate it
+    return response
+
 # -------------------------
 # Routes
 # -------------------------
 
+@app.route('/assets/<name>')
+def static_asset(name):
+    if name not in STATIC_ASSETS:
+        abort(404)
+    mimetype, body = STATIC_ASSETS[name]
+    response = app.response_class(body, mimetype=mimetype)
+    response.set_etag(ASSET_VERSIONS[name])
+    response.cache_control.public = True
+    if request.args.get('v') == ASSET_VERSIONS[name]:
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
 @app.route('/')
 def home():
     chain_length = len(voting_chain.chain)
@@ -510,7 +2977,7 @@ def home():
     
     messages = session.pop('messages', [])
     
-    return render_template_string(HTML_TEMPLATE, 
+    return render_template('home.html', 
                                  candidates=voting_chain.candidates,
                                  chain_length=chain_length,
                                  vote_count=vote_count,
@@ -525,25 +2992,25 @@ def vote():
         session['messages'] = [{'type': 'danger', 'icon': 'exclamation-circle', 'text': 'Missing voter ID or vote selection'}]
         return redirect(url_for('home'))
     
+    # The ballot form submits candidate IDs; a name is accepted too. Ballots are built by
+    # normalize_vote everywhere, so peers re-checking a block see exactly the shape they expect.
+    try:
+        vote_data = normalize_vote({'voter_id': voter_id, 'vote': vote}, voting_chain.candidate_registry)
+    except ValueError:
+        session['messages'] = [{'type': 'danger', 'icon': 'exclamation-circle', 'text': 'Unknown candidate. Please choose from the list.'}]
+        return redirect(url_for('home'))
+    candidate_id = vote_data['vote']
+    
     # Check if voter has already voted before processing
-    if voter_id in voting_chain.voters:
+    if vote_data['voter_id'] in voting_chain.voters:
         session['messages'] = [{'type': 'warning', 'icon': 'exclamation-triangle', 'text': 'You have already voted. Each voter ID can only vote once.'}]
         return redirect(url_for('home'))
     
-    vote_data = {
-        'voter_id': voter_id,
-        'vote': vote,
-        'timestamp': time.time()
-    }
-    
-    # Simplify the mining process for votes to make it faster
-    voting_chain.difficulty = 1  # Temporarily reduce difficulty for voting
-    
     # Process vote immediately
     result = voting_chain.add_vote(vote_data)
     
     if result:
-        session['messages'] = [{'type': 'success', 'icon': 'check-circle', 'text': f'Your vote for {vote} has been securely recorded on the blockchain!'}]
+        session['messages'] = [{'type': 'success', 'icon': 'check-circle', 'text': f'Your vote for {voting_chain.candidates[candidate_id]} has been securely recorded on the blockchain! Receipt: {vote_receipt(vote_data)}'}]
     else:
         session['messages'] = [{'type': 'warning', 'icon': 'exclamation-triangle', 'text': 'You have already voted. Each voter ID can only vote once.'}]
     
@@ -553,68 +3020,25 @@ def vote():
 # Remove the background processing route since we're processing votes immediately
 @app.route('/process_vote', methods=['POST'])
 def process_vote():
-    data = request.get_json()
-    voter_id = data.get('voter_id')
-    vote = data.get('vote')
-    
-    vote_data = {
-        'voter_id': voter_id,
-        'vote': vote,
-        'timestamp': time.time()
-    }
+    data = request.get_json(silent=True) or {}
+    # 'vote' is a candidate ID, or a candidate name
+    try:
+        vote_data = normalize_vote({'voter_id': data.get('voter_id'), 'vote': data.get('vote')},
+                                   voting_chain.candidate_registry)
+    except ValueError as error:
+        return jsonify({'success': False, 'error': str(error).capitalize()}), 400
+    candidate_id = vote_data['vote']
     
     result = voting_chain.add_vote(vote_data)
     
     if result:
-        session['messages'] = [{'type': 'success', 'icon': 'check-circle', 'text': f'Your vote for {vote} has been securely recorded on the blockchain!'}]
+        session['messages'] = [{'type': 'success', 'icon': 'check-circle', 'text': f'Your vote for {voting_chain.candidates[candidate_id]} has been securely recorded on the blockchain!'}]
     else:
         session['messages'] = [{'type': 'warning', 'icon': 'exclamation-triangle', 'text': 'You have already voted. Each voter ID can only vote once.'}]
     
-    return jsonify({'success': result})
+    return jsonify({'success': result, 'receipt': vote_receipt(vote_data) if result else None})
 
-@app.route('/results')
-def results():
-    vote_counts = {}
-    for candidate in voting_chain.candidates:
-        vote_counts[candidate] = 0
-    
-    # Debug information
-    print(f"Total blocks in chain: {len(voting_chain.chain)}")
-    
-    # Properly count votes from all blocks
-    for block in voting_chain.chain[1:]:  # Skip genesis block
-        try:
-            vote_data = block.vote_data
-            if isinstance(vote_data, dict) and 'vote' in vote_data:
-                candidate = vote_data['vote']
-                print(f"Found vote for: {candidate}")
-                if candidate in vote_counts:
-                    vote_counts[candidate] += 1
-                else:
-                    print(f"Warning: Vote for unknown candidate: {candidate}")
-        except Exception as e:
-            print(f"Error processing block: {e}")
-    
-    # Calculate percentages and find winner
-    total_votes = sum(vote_counts.values())
-    print(f"Total votes counted: {total_votes}")
-    percentages = {}
-    winner = None
-    max_votes = 0
-    
-    for candidate, count in vote_counts.items():
-        if total_votes > 0:
-            percentages[candidate] = round((count / total_votes) * 100, 1)
-        else:
-            percentages[candidate] = 0
-            
-        if count > max_votes:
-            max_votes = count
-            winner = candidate
-    
-    messages = session.pop('messages', [])
-    
-    return render_template_string('''
+PAGE_TEMPLATES['results.html'] = '''
     <!doctype html>
     <html lang="en">
     <head>
@@ -624,8 +3048,8 @@ def results():
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
         <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
         <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+        <link rel="stylesheet" href="{{ asset_url('base.css') }}">
         <style>
-            ''' + BASE_CSS + '''
             .results-card {
                 max-width: 750px;
                 margin: auto;
@@ -760,37 +3184,118 @@ def results():
             });
         });
     </script>
-    ''' + DARK_MODE_JS + '''
+    <script src="{{ asset_url('dark-mode.js') }}"></script>
     </body>
     </html>
-    ''', vote_counts=vote_counts, percentages=percentages, winner=winner, 
-        chain_length=len(voting_chain.chain), total_votes=total_votes)
+    '''
 
-@app.route('/chain')
-def get_chain():
-    chain_data = []
-    for block in voting_chain.chain:
-        block_info = {
-            'index': block.index,
-            'timestamp': block.timestamp,
-            'hash': block.hash,
-            'previous_hash': block.previous_hash,
-            'nonce': block.nonce
-        }
+@app.route('/results')
+def results():
+    session.pop('messages', [])
+    
+    def render():
+        # Read from the tally index instead of rescanning the chain
+        vote_counts = voting_chain.get_vote_counts()
         
-        # Don't show voter_id in the public view for privacy
-        if block.index > 0:  # Skip genesis block
-            vote_data = block.vote_data.copy() if isinstance(block.vote_data, dict) else {'data': block.vote_data}
-            if 'voter_id' in vote_data:
-                vote_data['voter_id'] = vote_data['voter_id'][:4] + '*' * (len(vote_data['voter_id']) - 4)
-            block_info['vote_data'] = vote_data
-        else:
-            block_info['vote_data'] = block.vote_data
+        # Calculate percentages and find winner
+        total_votes = sum(vote_counts.values())
+        percentages = {}
+        winner = None
+        max_votes = 0
         
-        chain_data.append(block_info)
+        for candidate, count in vote_counts.items():
+            if total_votes > 0:
+                percentages[candidate] = round((count / total_votes) * 100, 1)
+            else:
+                percentages[candidate] = 0
+                
+            if count > max_votes:
+                max_votes = count
+                winner = candidate
+        
+        return render_template('results.html', vote_counts=vote_counts, percentages=percentages, winner=winner, 
+            chain_length=len(voting_chain.chain), total_votes=total_votes)
+    return cached_page(render)
+
+def mask_voter_id(voter_id):
+    return voter_id[:4] + '*' * (len(voter_id) - 4)
+
+def public_block_info(block):
+    """JSON-safe view of a block with voter IDs masked for privacy"""
+    block_info = {
+        'index': block.index,
+        'timestamp': block.timestamp,
+        'hash': block.hash,
+        'previous_hash': block.previous_hash,
+        'merkle_root': block.merkle_root,
+        'nonce': block.nonce
+    }
+    
+    # Don't show voter_id in the public view for privacy
+    if block.index > 0:  # Skip genesis block
+        vote_data = block.vote_data.copy() if isinstance(block.vote_data, dict) else {'data': block.vote_data}
+        if 'voter_id' in vote_data:
+            vote_data['voter_id'] = mask_voter_id(vote_data['voter_id'])
+        if 'votes' in vote_data:
+            vote_data['votes'] = [dict(v, voter_id=mask_voter_id(v['voter_id'])) if 'voter_id' in v else v
+                                  for v in vote_data['votes']]
+        block_info['vote_data'] = vote_data
+    else:
+        block_info['vote_data'] = block.vote_data
+    return block_info
+
+def name_ballots(vote_data):
+    """Vote data with each candidate-ID ballot's current name alongside it, for display.
     
-    # Return HTML visualization instead of JSON
-    return render_template_string('''
+    Only the HTML chain explorer uses this: exports keep the on-chain bytes, which a rename must not change.
+    """
+    registry = voting_chain.candidate_registry
+    def named(vote):
+        if not isinstance(vote, dict) or type(vote.get('vote')) is not int or registry.resolve(vote['vote']) is None:
+            return vote
+        return dict(vote, candidate=registry.names[vote['vote']])
+    if not isinstance(vote_data, dict):
+        return vote_data
+    if 'votes' in vote_data:
+        return dict(vote_data, votes=[named(vote) for vote in vote_data['votes']])
+    return named(vote_data)
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+def block_page_range(default_limit=None):
+    """Turn ?after=<index>&limit=<n> into a range of block indexes (cursor pagination)"""
+    chain_length = len(voting_chain.chain)
+    start = max(request.args.get('after', -1, type=int) + 1, 0)
+    limit = request.args.get('limit', default_limit, type=int)
+    if limit is None:
+        return range(start, chain_length)
+    limit = min(max(limit, 1), API_MAX_PAGE_SIZE)
+    return range(start, min(start + limit, chain_length))
+
+@app.route('/api/blocks')
+def api_blocks():
+    page = block_page_range(API_PAGE_SIZE)
+    chain_length = len(voting_chain.chain)
+    return jsonify({
+        'blocks': [public_block_info(voting_chain.chain[index]) for index in page],
+        'length': chain_length,
+        'next_after': page.stop - 1 if page.stop < chain_length else None
+    })
+
+@app.route('/api/blocks/<block_id>')
+def api_block(block_id):
+    # Numeric IDs are chain heights; anything else is treated as a block hash
+    if block_id.isdecimal():
+        index = int(block_id)
+        block = voting_chain.chain[index] if index < len(voting_chain.chain) else None
+    else:
+        block = voting_chain.get_block_by_hash(block_id)
+    if block is None:
+        return jsonify({'error': 'Block not found'}), 404
+    return jsonify(public_block_info(block))
+
+PAGE_TEMPLATES['chain.html'] = '''
     <!doctype html>
     <html lang="en">
     <head>
@@ -799,8 +3304,8 @@ def get_chain():
         <meta name="viewport" content="width=device-width, initial-scale=1">
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
         <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+        <link rel="stylesheet" href="{{ asset_url('base.css') }}">
         <style>
-            ''' + BASE_CSS + '''
             .blockchain-container {
                 max-width: 900px;
                 margin: auto;
@@ -895,7 +3400,7 @@ def get_chain():
         </style>
     </head>
     <body>
-    ''' + NAVBAR_TEMPLATE.replace('{{ active_page }}', 'chain') + '''
+    {% set active_page = 'chain' %}{% include 'navbar.html' %}
     
     <div class="container blockchain-container">
         <div class="text-center mb-5">
@@ -924,6 +3429,12 @@ def get_chain():
                     <strong>Previous Hash:</strong>
                     <div class="hash-value">{{ block.previous_hash }}</div>
                 </div>
+                {% if block.merkle_root %}
+                <div class="mt-3">
+                    <strong>Merkle Root:</strong>
+                    <div class="hash-value">{{ block.merkle_root }}</div>
+                </div>
+                {% endif %}
                 <div class="mt-3">
                     <strong>Timestamp:</strong>
                     <div class="timestamp">{{ block.timestamp }} ({{ format_timestamp(block.timestamp) }})</div>
@@ -935,6 +3446,14 @@ def get_chain():
             </div>
         </div>
         {% endfor %}
+        
+        {% if next_after is not none %}
+        <div class="text-center">
+            <a href="/chain?after={{ next_after }}&limit={{ page_limit }}" class="btn btn-outline-primary">
+                <i class="fas fa-arrow-down me-2"></i> Next blocks
+            </a>
+        </div>
+        {% endif %}
     </div>
     
     <button class="btn btn-primary verify-chain-btn" id="verifyChainBtn" title="Verify Blockchain Integrity">
@@ -944,7 +3463,7 @@ def get_chain():
     <div class="verification-result" id="verificationResult"></div>
     
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    ''' + DARK_MODE_JS + '''
+    <script src="{{ asset_url('dark-mode.js') }}"></script>
     <script>
         document.getElementById('verifyChainBtn').addEventListener('click', function() {
             fetch('/verify')
@@ -969,73 +3488,472 @@ def get_chain():
     </script>
     </body>
     </html>
-    ''', chain=chain_data, chain_length=len(chain_data), 
-    format_timestamp=lambda ts: datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'),
-    format_data=lambda data: json.dumps(data, indent=2))
+    '''
+
+@app.route('/chain')
+def get_chain():
+    # Paged like /api/blocks; pages bigger than the cache limit are streamed instead of being held in the cache
+    cacheable = len(block_page_range(API_PAGE_SIZE)) <= PAGE_CACHE_MAX_BLOCKS
+    
+    def render():
+        page = block_page_range(API_PAGE_SIZE)
+        chain_length = len(voting_chain.chain)
+        
+        # Blocks are rendered lazily so memory stays bounded however long the chain is
+        def chain_blocks():
+            for index in page:
+                yield public_block_info(voting_chain.chain[index])
+        
+        # Return HTML visualization instead of JSON
+        template = render_template if cacheable else stream_template
+        return template('chain.html', chain=chain_blocks(), chain_length=chain_length,
+        next_after=page.stop - 1 if page.stop < chain_length else None, page_limit=len(page),
+        format_timestamp=lambda ts: datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'),
+        format_data=lambda data: json.dumps(name_ballots(data), indent=2))
+    return cached_page(render, cacheable)
 
 # Add a route to verify the blockchain
 @app.route('/verify')
 def verify_chain():
-    is_valid = voting_chain.is_chain_valid()
-    return jsonify({'valid': is_valid})
+    # Only blocks past the trusted checkpoint are re-hashed; full audits run via /admin/verify
+    is_valid = voting_chain.verify_incremental()
+    return jsonify({'valid': is_valid, 'verified_height': voting_chain.checkpoint[0]})
 
-# Update the candidates management page with authentication
-@app.route('/candidates', methods=['GET', 'POST'])
-def manage_candidates():
-    message = None
+@app.route('/admin/verify', methods=['GET', 'POST'])
+def admin_verify():
+    # Same admin session as /candidates: a full audit forks worker processes
+    if not session.get('admin_authenticated', False):
+        return jsonify({'error': 'Admin login required'}), 403
+    if request.method == 'POST':
+        # workers > 1 shards the audit across a process pool, at most one per CPU
+        workers = min(max(request.values.get('workers', 1, type=int), 1), os.cpu_count() or 1)
+        started = voting_chain.start_full_verification(workers)
+        return jsonify({'started': started, 'job': voting_chain.verification_job}), 202 if started else 409
+    return jsonify({'job': voting_chain.verification_job, 'checkpoint': list(voting_chain.checkpoint)})
+
+# -------------------------
+# Election Routes
+# -------------------------
+
+def election_summary(election_id, chain):
+    genesis = chain.chain[0].vote_data
+    counts = chain.get_vote_counts()
+    return {
+        'election': election_id,
+        'title': genesis.get('title', 'Election') if isinstance(genesis, dict) else 'Election',
+        'candidates': [{'id': candidate_id, 'name': name, 'votes': count}
+                       for candidate_id, (name, count) in enumerate(counts.items())],
+        'total_votes': sum(counts.values()),
+        'length': len(chain.chain),
+        'pending_votes': len(chain.pending_transactions)
+    }
+
+@app.route('/elections', methods=['GET', 'POST'])
+def list_elections():
+    if request.method == 'POST':
+        # Same admin session as /candidates
+        if not session.get('admin_authenticated', False):
+            return jsonify({'error': 'Admin login required'}), 403
+        data = request.get_json(silent=True) or {}
+        try:
+            chain = elections.create(data.get('id'), data.get('title'), data.get('candidates'))
+        except ValueError as error:
+            return jsonify({'error': str(error)}), 400
+        return jsonify(election_summary(data['id'], chain)), 201
+    return jsonify({'elections': [election_summary(election_id, chain) for election_id, chain in elections.items()],
+                    **elections.root()})
+
+@app.route('/elections/verify')
+def verify_elections():
+    # Every shard is verified in one pass, each past its own trusted checkpoint
+    results = elections.verify_all()
+    return jsonify({
+        'valid': all(valid for valid, _ in results.values()),
+        'elections': {election_id: {'valid': valid, 'verified_height': height}
+                      for election_id, (valid, height) in results.items()},
+        **elections.root()
+    })
+
+@app.route('/elections/<election_id>')
+def election_detail(election_id):
+    chain = elections.get(election_id)
+    if chain is None:
+        return jsonify({'error': 'Election not found'}), 404
+    # Where this shard sits under the cross-shard root, so its tip can be checked against a published root
+    audit = elections.root()
+    position = next(i for i, shard in enumerate(audit['shards']) if shard['election'] == election_id)
+    return jsonify(dict(election_summary(election_id, chain), root=audit['root'], shard=audit['shards'][position],
+                        root_proof=merkle_proof([shard['leaf'] for shard in audit['shards']], position)))
+
+@app.route('/elections/<election_id>/vote', methods=['POST'])
+def election_vote(election_id):
+    chain = elections.get(election_id)
+    if chain is None:
+        return jsonify({'error': 'Election not found'}), 404
+    data = request.get_json(silent=True) or {}
+    # 'vote' is a candidate ID, or a candidate name
+    try:
+        vote_data = normalize_vote({'voter_id': data.get('voter_id'), 'vote': data.get('vote')}, chain.candidate_registry)
+    except ValueError as error:
+        return jsonify({'success': False, 'error': str(error).capitalize()}), 400
+    result = chain.add_vote(vote_data)
+    return jsonify({'success': result, 'receipt': vote_receipt(vote_data) if result else None})
+
+@app.route('/ballots', methods=['POST'])
+def cast_ballot():
+    """A voter's choices in several contests at once: {"voter_id": ..., "votes": {election ID: candidate}}"""
+    data = request.get_json(silent=True) or {}
+    voter_id = data.get('voter_id')
+    choices = data.get('votes')
+    if not voter_id or not isinstance(choices, dict) or not choices:
+        return jsonify({'error': 'Expected voter_id and a votes object mapping election IDs to candidates'}), 400
     
-    # Check if already authenticated in session
-    authenticated = session.get('admin_authenticated', False)
+    # Check every contest before recording any, so a bad ballot records nothing
+    ballot = []
+    for election_id, choice in choices.items():
+        chain = elections.get(election_id)
+        if chain is None:
+            return jsonify({'error': f'Election "{election_id}" not found'}), 404
+        try:
+            vote_data = normalize_vote({'voter_id': voter_id, 'vote': choice}, chain.candidate_registry)
+        except ValueError as error:
+            return jsonify({'error': f'{str(error).capitalize()} in election "{election_id}"'}), 400
+        ballot.append((election_id, chain, vote_data))
     
-    # Handle login form submission
-    if request.method == 'POST' and 'admin_login' in request.form:
-        username = request.form.get('username')
-        password = request.form.get('password')
-        
-        # Simple hardcoded authentication
-        if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
-            session['admin_authenticated'] = True
-            authenticated = True
-            message = {'type': 'success', 'text': 'Login successful!', 'icon': 'check-circle'}
-        else:
-            message = {'type': 'danger', 'text': 'Invalid username or password!', 'icon': 'exclamation-circle'}
+    # Each contest goes to its own shard; with background sealing the shards mine their blocks concurrently
+    contests = {}
+    for election_id, chain, vote_data in ballot:
+        result = chain.add_vote(vote_data)
+        contests[election_id] = {'success': result, 'receipt': vote_receipt(vote_data) if result else None}
+    return jsonify({'contests': contests})
+
+# -------------------------
+# Node Consensus Routes
+# -------------------------
+
+def gzip_json(payload):
+    """JSON response, gzip-compressed when the client accepts it"""
+    if 'gzip' not in request.accept_encodings:
+        return jsonify(payload)
+    body = gzip.compress(json.dumps(payload).encode(), compresslevel=5)
+    return app.response_class(body, mimetype='application/json', headers={'Content-Encoding': 'gzip'})
+
+def sync_authorized():
+    """True if the request carries the node token; without a configured token no request is a peer"""
+    token = request.headers.get('X-Node-Token')
+    return bool(NODE_SYNC_TOKEN) and token is not None and hmac.compare_digest(token, NODE_SYNC_TOKEN)
+
+def peering_authorized():
+    # Choosing peers (and syncing from them) decides which chain this node adopts
+    return session.get('admin_authenticated', False) or sync_authorized()
+
+@app.route('/nodes/register', methods=['POST'])
+def register_nodes():
+    if not peering_authorized():
+        return jsonify({'error': 'Admin login or node token required'}), 403
+    data = request.get_json(silent=True) or {}
+    nodes = data.get('nodes') or request.form.getlist('nodes')
+    if not nodes:
+        return jsonify({'error': 'Please supply a list of nodes'}), 400
+    registered = [node for node in nodes if voting_chain.register_node(node)]
+    return jsonify({'registered': registered, 'total_nodes': sorted(voting_chain.nodes)}), 201
+
+@app.route('/nodes/resolve', methods=['POST'])
+def resolve_nodes():
+    if not peering_authorized():
+        return jsonify({'error': 'Admin login or node token required'}), 403
+    source = voting_chain.resolve_conflicts()
+    return jsonify({'replaced': source is not None, 'source': source, 'length': len(voting_chain.chain),
+                    'tip_hash': voting_chain.get_latest_block().hash})
+
+@app.route('/sync/status')
+def sync_status():
+    if not sync_authorized():
+        return jsonify({'error': 'Invalid node token'}), 403
+    return jsonify({'length': len(voting_chain.chain), 'tip_hash': voting_chain.get_latest_block().hash})
+
+@app.route('/sync/blocks')
+def sync_blocks():
+    # Unmasked blocks so peers can re-verify hashes; pages use the same after/limit cursor as /api/blocks
+    if not sync_authorized():
+        return jsonify({'error': 'Invalid node token'}), 403
+    page = block_page_range(voting_chain.SYNC_BATCH)
+    return gzip_json({'blocks': [voting_chain.chain[index].to_dict() for index in page]})
+
+@app.route('/gossip', methods=['POST'])
+def gossip():
+    if not sync_authorized():
+        return jsonify({'error': 'Invalid node token'}), 403
+    accepted = voting_chain.gossip.receive(request.get_json(silent=True) or {})
+    return jsonify({'accepted': accepted}), 202
+
+@app.route('/gossip/votes/<receipt>')
+def gossip_vote(receipt):
+    if not sync_authorized():
+        return jsonify({'error': 'Invalid node token'}), 403
+    vote = voting_chain.find_vote(receipt)
+    if vote is None:
+        return jsonify({'error': 'Vote not found'}), 404
+    return jsonify(vote)
+
+# -------------------------
+# Streaming Exports
+# -------------------------
+
+EXPORT_BATCH_BLOCKS = 256  # Blocks serialised per chunk of /export/chain.ndjson
+
+def export_line(block, raw=False):
+    """One line of /export/chain.ndjson: the public (masked) block, or the full block for peers"""
+    return (json.dumps(block.to_dict() if raw else public_block_info(block)) + '\n').encode()
+
+def export_blocks(chain, start, stop, raw=False):
+    """NDJSON bytes for blocks [start, stop), a batch of blocks per chunk"""
+    for batch_start in range(start, stop, EXPORT_BATCH_BLOCKS):
+        batch_stop = min(batch_start + EXPORT_BATCH_BLOCKS, stop)
+        yield b''.join(export_line(chain[index], raw) for index in range(batch_start, batch_stop))
+
+class ExportIndex:
+    """Byte offset of every block's line in the chain export, so ranged requests can seek straight to a block.
     
-    # Handle logout
-    if 'logout' in request.args:
-        session.pop('admin_authenticated', None)
-        return redirect(url_for('manage_candidates'))
+    Offsets are extended as the chain grows, and rebuilt if a fork has replaced blocks already indexed.
+    """
     
-    # Handle candidate management actions if authenticated
-    if authenticated and request.method == 'POST' and 'action' in request.form:
-        action = request.form.get('action')
-        
-        if action == 'add':
-            candidate_name = request.form.get('candidate_name')
-            if candidate_name and candidate_name.strip():
-                if voting_chain.add_candidate(candidate_name.strip()):
-                    message = {'type': 'success', 'text': f'Candidate "{candidate_name}" added successfully!', 'icon': 'check-circle'}
-                else:
-                    message = {'type': 'warning', 'text': f'Candidate "{candidate_name}" already exists!', 'icon': 'exclamation-triangle'}
-            else:
-                message = {'type': 'danger', 'text': 'Candidate name cannot be empty!', 'icon': 'exclamation-circle'}
-                
-        elif action == 'modify':
-            old_name = request.form.get('old_name')
-            new_name = request.form.get('candidate_name')
-            
-            if not old_name:
-                message = {'type': 'danger', 'text': 'Please select a candidate to modify!', 'icon': 'exclamation-circle'}
-            elif not new_name or not new_name.strip():
-                message = {'type': 'danger', 'text': 'New candidate name cannot be empty!', 'icon': 'exclamation-circle'}
+    def __init__(self, raw=False):
+        self.raw = raw
+        self.offsets = array.array('Q', [0])
+        self.tip_hash = None  # Hash of the last indexed block
+        self.lock = threading.Lock()
+    
+    def extend(self, chain, length):
+        """Offsets covering at least the first `length` blocks of `chain`"""
+        with self.lock:
+            indexed = len(self.offsets) - 1
+            if indexed and (indexed > len(chain) or chain[indexed - 1].hash != self.tip_hash):
+                self.offsets = array.array('Q', [0])
+                indexed = 0
+            for index in range(indexed, length):
+                block = chain[index]
+                self.offsets.append(self.offsets[-1] + len(export_line(block, self.raw)))
+                self.tip_hash = block.hash
+            return self.offsets
+
+EXPORT_INDEXES = {False: ExportIndex(), True: ExportIndex(raw=True)}
+
+def byte_window(chunks, skip, count):
+    """Drop the first `skip` bytes of a chunk stream and stop after `count` more"""
+    for chunk in chunks:
+        if skip >= len(chunk):
+            skip -= len(chunk)
+            continue
+        chunk = chunk[skip:skip + count]
+        skip = 0
+        count -= len(chunk)
+        yield chunk
+        if count <= 0:
+            return
+
+def gzip_stream(chunks):
+    """Gzip a chunk stream on the fly"""
+    compressor = zlib.compressobj(5, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def send_export(read, size, etag, mimetype, filename):
+    """Streamed download that honours Range/If-Range, gzip-compressed when sent whole.
+    
+    `read(start, stop)` yields the body bytes in [start, stop), with stop None for the whole body, and
+    `size()` gives the full length. Both are only used for ranged requests, so a plain download starts
+    streaming at once. Partial responses are never compressed, so byte offsets stay the same between resumes.
+    """
+    headers = {'ETag': f'"{etag}"', 'Accept-Ranges': 'bytes',
+               'Content-Disposition': f'attachment; filename={filename}'}
+    byte_range = request.range
+    if (byte_range is not None and len(byte_range.ranges) == 1
+            and ('If-Range' not in request.headers or request.if_range.etag == etag)):
+        total = size()
+        span = byte_range.range_for_length(total)
+        if span is None:
+            headers['Content-Range'] = f'bytes */{total}'
+            return app.response_class(status=416, headers=headers)
+        start, stop = span
+        headers['Content-Range'] = f'bytes {start}-{stop - 1}/{total}'
+        headers['Content-Length'] = str(stop - start)
+        return app.response_class(read(start, stop), status=206, mimetype=mimetype, headers=headers)
+    
+    body = read(0, None)
+    headers['Vary'] = 'Accept-Encoding'
+    if 'gzip' in request.accept_encodings:
+        body = gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    return app.response_class(body, mimetype=mimetype, headers=headers)
+
+@app.route('/export/results.csv')
+def export_results():
+    # Counts come from the tally index, so the export costs O(candidates) however long the chain is
+    counts = voting_chain.get_vote_counts()
+    total_votes = sum(counts.values())
+    rows = io.StringIO()
+    writer = csv.writer(rows, lineterminator='\n')
+    writer.writerow(['candidate', 'votes', 'percent'])
+    for candidate, count in counts.items():
+        writer.writerow([candidate, count, f'{count / total_votes * 100:.2f}' if total_votes else '0.00'])
+    body = rows.getvalue().encode()
+    tip = voting_chain.get_latest_block()
+    
+    def read(start, stop):
+        yield body[start:stop]
+    return send_export(read, lambda: len(body), f'{tip.index + 1}-{tip.hash}', 'text/csv', 'results.csv')
+
+@app.route('/export/chain.ndjson')
+def export_chain():
+    # ?raw=1 exports unmasked blocks whose hashes can be recomputed; only peers with the node token get it,
+    # so a node without NODE_SYNC_TOKEN never serves unmasked voter IDs
+    raw = request.args.get('raw') == '1'
+    if raw and not sync_authorized():
+        return jsonify({'error': 'Invalid node token'}), 403
+    chain = voting_chain.chain
+    # ?length= pins the export to a chain prefix, so a resumed download sees the same bytes as the first attempt
+    length = min(max(request.args.get('length', len(chain), type=int), 1), len(chain))
+    index = EXPORT_INDEXES[raw]
+    
+    def read(start, stop):
+        if stop is None:
+            return export_blocks(chain, 0, length, raw)
+        offsets = index.extend(chain, length)
+        first = bisect.bisect_right(offsets, start, 0, length) - 1
+        return byte_window(export_blocks(chain, first, length, raw), start - offsets[first], stop - start)
+    
+    response = send_export(read, lambda: index.extend(chain, length)[length], f'{length}-{chain[length - 1].hash}',
+                           'application/x-ndjson', 'chain.ndjson')
+    response.headers['X-Chain-Length'] = str(length)
+    return response
+
+# -------------------------
+# Bulk Vote Ingestion
+# -------------------------
+
+BULK_CHUNK_SIZE = 5000  # Records validated and sealed into one block at a time
+BULK_MAX_CHUNK_SIZE = 100000  # Keeps block positions well inside RECEIPT_POSITION_BITS
+# Shared secret polling stations send as X-Upload-Token; unset leaves bulk upload open
+BULK_UPLOAD_TOKEN = os.environ.get("BULK_UPLOAD_TOKEN")
+
+def iter_vote_records(lines, fmt):
+    """Lazily parse NDJSON or CSV (voter_id, vote[, timestamp]) lines into (line number, record, error)"""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None, 'malformed JSON'
+            continue
+        if isinstance(record, dict):
+            yield number, record, None
+        else:
+            yield number, None, 'expected a JSON object'
+
+def normalize_vote(record, registry):
+    """Vote dict in the shape /vote builds, or ValueError describing what is wrong.
+    
+    'vote' may be a candidate ID or a candidate name, and is stored as the ID. IDs may come as
+    integers (JSON) or decimal strings (CSV columns, form fields); a decimal string is always an ID.
+    """
+    voter_id = str(record.get('voter_id') or '').strip()
+    vote = record.get('vote')
+    if not voter_id:
+        raise ValueError('missing voter_id')
+    if vote is None or vote == '' or not isinstance(vote, (int, str)):
+        raise ValueError('missing vote')
+    if isinstance(vote, str) and vote.strip().isdecimal():
+        vote = int(vote)
+    vote = registry.resolve(vote)
+    if vote is None:
+        raise ValueError('unknown candidate')
+    timestamp = record.get('timestamp')
+    try:
+        timestamp = float(timestamp) if timestamp not in (None, '') else time.time()
+    except (TypeError, ValueError):
+        raise ValueError('invalid timestamp')
+    return {'voter_id': voter_id, 'vote': vote, 'timestamp': timestamp}
+
+def ingest_votes(chain, records, chunk_size=BULK_CHUNK_SIZE):
+    """Add parsed records a chunk at a time (one lock acquisition and one block each), yielding a result per record"""
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        results = []
+        votes = []
+        for number, record, error in chunk:
+            if error is None:
+                try:
+                    votes.append(normalize_vote(record, chain.candidate_registry))
+                    results.append({'line': number})
+                    continue
+                except ValueError as invalid:
+                    error = str(invalid)
+            results.append({'line': number, 'status': 'invalid', 'reason': error})
+        statuses = iter(chain.add_votes(votes))
+        vote_iter = iter(votes)
+        for result in results:
+            if 'status' in result:
+                yield result
+                continue
+            vote_data = next(vote_iter)
+            result['status'], reason = next(statuses)
+            if reason:
+                result['reason'] = reason
             else:
-                if voting_chain.modify_candidate(old_name, new_name.strip()):
-                    message = {'type': 'success', 'text': f'Candidate renamed from "{old_name}" to "{new_name}" successfully!', 'icon': 'check-circle'}
-                else:
-                    message = {'type': 'danger', 'text': f'Candidate "{old_name}" not found!', 'icon': 'exclamation-circle'}
+                result['receipt'] = vote_receipt(vote_data)
+            yield result
+
+@app.route('/api/votes/bulk', methods=['POST'])
+def bulk_votes():
+    if BULK_UPLOAD_TOKEN and request.headers.get('X-Upload-Token') != BULK_UPLOAD_TOKEN:
+        return jsonify({'error': 'Invalid upload token'}), 403
+    fmt = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'ndjson')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    chunk_size = min(max(request.args.get('chunk_size', BULK_CHUNK_SIZE, type=int), 1), BULK_MAX_CHUNK_SIZE)
+    lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
     
-    # Show login page if not authenticated
-    if not authenticated:
-        return render_template_string('''
+    # Stream the report as records are processed, so neither the upload nor the report is held in memory
+    def report():
+        totals = {'accepted': 0, 'duplicate': 0, 'invalid': 0}
+        for result in ingest_votes(voting_chain, iter_vote_records(lines, fmt), chunk_size):
+            totals[result['status']] += 1
+            yield json.dumps(result) + '\n'
+        yield json.dumps({'summary': totals}) + '\n'
+    return app.response_class(stream_with_context(report()), mimetype='application/x-ndjson')
+
+# Let a voter confirm their vote landed without scanning the chain. Only the status: anyone can
+# ask about any voter ID, and the block or receipt would point at the ballot itself.
+@app.route('/api/voters/<voter_id>')
+def voter_status(voter_id):
+    status = voting_chain.get_vote_status(voter_id)
+    return jsonify({'voter_id': mask_voter_id(voter_id), 'status': status}), 404 if status == 'not_found' else 200
+
+# Let a voter check that their vote was sealed into a block
+@app.route('/proof/<voter_receipt>')
+def vote_proof(voter_receipt):
+    proof = voting_chain.get_inclusion_proof(voter_receipt)
+    if proof is None:
+        pending = any(vote_receipt(vote) == voter_receipt for vote in voting_chain.pending_transactions)
+        return jsonify({'included': False, 'pending': pending}), 404
+    proof['included'] = True
+    proof['receipt'] = voter_receipt
+    return jsonify(proof)
+
+PAGE_TEMPLATES['candidates_login.html'] = '''
         <!doctype html>
         <html lang="en">
         <head>
@@ -1044,8 +3962,8 @@ def manage_candidates():
             <meta name="viewport" content="width=device-width, initial-scale=1">
             <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
             <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+            <link rel="stylesheet" href="{{ asset_url('base.css') }}">
             <style>
-                ''' + BASE_CSS + '''
                 .login-card {
                     max-width: 450px;
                     margin: auto;
@@ -1061,7 +3979,7 @@ def manage_candidates():
             </style>
         </head>
         <body>
-        ''' + NAVBAR_TEMPLATE.replace('{{ active_page }}', 'candidates') + '''
+        {% set active_page = 'candidates' %}{% include 'navbar.html' %}
         
         <div class="container">
             <div class="card shadow-lg login-card">
@@ -1106,10 +4024,9 @@ def manage_candidates():
         <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
         </body>
         </html>
-        ''', message=message)
-    
-    # Show candidate management page if authenticated
-    return render_template_string('''
+        '''
+
+PAGE_TEMPLATES['candidates.html'] = '''
     <!doctype html>
     <html lang="en">
     <head>
@@ -1118,8 +4035,8 @@ def manage_candidates():
         <meta name="viewport" content="width=device-width, initial-scale=1">
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
         <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+        <link rel="stylesheet" href="{{ asset_url('base.css') }}">
         <style>
-            ''' + BASE_CSS + '''
             .candidates-card {
                 max-width: 750px;
                 margin: auto;
@@ -1144,7 +4061,7 @@ def manage_candidates():
         </style>
     </head>
     <body>
-    ''' + NAVBAR_TEMPLATE.replace('{{ active_page }}', 'candidates') + '''
+    {% set active_page = 'candidates' %}{% include 'navbar.html' %}
     
     <div class="container candidates-card">
         <div class="admin-header">
@@ -1224,12 +4141,72 @@ def manage_candidates():
     </script>
     </body>
     </html>
-    ''', candidates=voting_chain.candidates, message=message)
+    '''
 
-# Add error handling for 404 and 500 errors
-@app.errorhandler(404)
-def page_not_found(e):
-    return render_template_string('''
+# Update the candidates management page with authentication
+@app.route('/candidates', methods=['GET', 'POST'])
+def manage_candidates():
+    message = None
+    
+    # Check if already authenticated in session
+    authenticated = session.get('admin_authenticated', False)
+    
+    # Handle login form submission
+    if request.method == 'POST' and 'admin_login' in request.form:
+        username = request.form.get('username')
+        password = request.form.get('password')
+        
+        # Simple hardcoded authentication
+        if username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
+            session['admin_authenticated'] = True
+            authenticated = True
+            message = {'type': 'success', 'text': 'Login successful!', 'icon': 'check-circle'}
+        else:
+            message = {'type': 'danger', 'text': 'Invalid username or password!', 'icon': 'exclamation-circle'}
+    
+    # Handle logout
+    if 'logout' in request.args:
+        session.pop('admin_authenticated', None)
+        return redirect(url_for('manage_candidates'))
+    
+    # Handle candidate management actions if authenticated
+    if authenticated and request.method == 'POST' and 'action' in request.form:
+        action = request.form.get('action')
+        
+        if action == 'add':
+            candidate_name = request.form.get('candidate_name')
+            if candidate_name and candidate_name.strip():
+                if voting_chain.add_candidate(candidate_name.strip()):
+                    message = {'type': 'success', 'text': f'Candidate "{candidate_name}" added successfully!', 'icon': 'check-circle'}
+                else:
+                    message = {'type': 'warning', 'text': f'Candidate "{candidate_name}" already exists!', 'icon': 'exclamation-triangle'}
+            else:
+                message = {'type': 'danger', 'text': 'Candidate name cannot be empty!', 'icon': 'exclamation-circle'}
+                
+        elif action == 'modify':
+            old_name = request.form.get('old_name')
+            new_name = request.form.get('candidate_name')
+            
+            if not old_name:
+                message = {'type': 'danger', 'text': 'Please select a candidate to modify!', 'icon': 'exclamation-circle'}
+            elif not new_name or not new_name.strip():
+                message = {'type': 'danger', 'text': 'New candidate name cannot be empty!', 'icon': 'exclamation-circle'}
+            else:
+                if voting_chain.modify_candidate(old_name, new_name.strip()):
+                    message = {'type': 'success', 'text': f'Candidate renamed from "{old_name}" to "{new_name}" successfully!', 'icon': 'check-circle'}
+                elif new_name.strip() in voting_chain.candidate_registry:
+                    message = {'type': 'warning', 'text': f'Candidate "{new_name}" already exists!', 'icon': 'exclamation-triangle'}
+                else:
+                    message = {'type': 'danger', 'text': f'Candidate "{old_name}" not found!', 'icon': 'exclamation-circle'}
+    
+    # Show login page if not authenticated
+    if not authenticated:
+        return render_template('candidates_login.html', message=message)
+    
+    # Show candidate management page if authenticated
+    return render_template('candidates.html', candidates=voting_chain.candidates, message=message)
+
+PAGE_TEMPLATES['404.html'] = '''
     <!doctype html>
     <html lang="en">
     <head>
@@ -1238,8 +4215,8 @@ def page_not_found(e):
         <meta name="viewport" content="width=device-width, initial-scale=1">
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
         <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+        <link rel="stylesheet" href="{{ asset_url('base.css') }}">
         <style>
-            ''' + BASE_CSS + '''
             .error-container {
                 max-width: 600px;
                 margin: 100px auto;
@@ -1252,7 +4229,7 @@ def page_not_found(e):
         </style>
     </head>
     <body>
-    ''' + NAVBAR_TEMPLATE.replace('{{ active_page }}', '') + '''
+    {% include 'navbar.html' %}
     
     <div class="container error-container">
         <div class="error-icon">
@@ -1266,14 +4243,17 @@ def page_not_found(e):
     </div>
     
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    ''' + DARK_MODE_JS + '''
+    <script src="{{ asset_url('dark-mode.js') }}"></script>
     </body>
     </html>
-    '''), 404
+    '''
 
-@app.errorhandler(500)
-def server_error(e):
-    return render_template_string('''
+# Add error handling for 404 and 500 errors
+@app.errorhandler(404)
+def page_not_found(e):
+    return render_template('404.html'), 404
+
+PAGE_TEMPLATES['500.html'] = '''
     <!doctype html>
     <html lang="en">
     <head>
@@ -1282,8 +4262,8 @@ def server_error(e):
         <meta name="viewport" content="width=device-width, initial-scale=1">
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
         <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+        <link rel="stylesheet" href="{{ asset_url('base.css') }}">
         <style>
-            ''' + BASE_CSS + '''
             .error-container {
                 max-width: 600px;
                 margin: 100px auto;
@@ -1296,7 +4276,7 @@ def server_error(e):
         </style>
     </head>
     <body>
-    ''' + NAVBAR_TEMPLATE.replace('{{ active_page }}', '') + '''
+    {% include 'navbar.html' %}
     
     <div class="container error-container">
         <div class="error-icon">
@@ -1310,24 +4290,51 @@ def server_error(e):
     </div>
     
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    ''' + DARK_MODE_JS + '''
+    <script src="{{ asset_url('dark-mode.js') }}"></script>
     </body>
     </html>
-    '''), 500
+    '''
 
-# Add a route to analyze blockchain security and performance
-@app.route('/analysis')
-def blockchain_analysis():
-    # Calculate some metrics
-    total_blocks = len(voting_chain.chain)
-    avg_mining_time = 0
-    total_votes = len(voting_chain.voters)
-    
-    # Calculate average mining time (simplified)
-    if total_blocks > 1:
-        avg_mining_time = round(sum(1 for block in voting_chain.chain if block.index > 0) / (total_blocks - 1), 2)
-    
-    return render_template_string('''
+@app.errorhandler(500)
+def server_error(e):
+    return render_template('500.html'), 500
+
+# -------------------------
+# Metrics Routes
+# -------------------------
+
+@app.before_request
+def start_request_timer():
+    request.environ['voting.started'] = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = request.environ.get('voting.started')
+    if started is not None:
+        # Label by URL rule, not path, so the number of series stays bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, (route, request.method))
+    return response
+
+def gauge(name, help_text, value):
+    return f'# HELP {name} {help_text}\n# TYPE {name} gauge\n{name} {value}'
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of the histograms plus a few gauges read at scrape time"""
+    sections = [histogram.exposition() for histogram in METRICS]
+    sections += [
+        gauge('voting_chain_length', 'Blocks on the chain, genesis included', len(voting_chain.chain)),
+        gauge('voting_pending_votes', 'Votes queued for the next block', len(voting_chain.pending_transactions)),
+        gauge('voting_registered_voters', 'Voter IDs that have voted or have a vote queued', len(voting_chain.voters)),
+        gauge('voting_mining_difficulty', 'Leading zero hex digits required of a block hash', voting_chain.difficulty),
+        gauge('voting_page_cache_hits', 'Page cache lookups served from memory', page_cache.hits),
+        gauge('voting_page_cache_misses', 'Page cache lookups that rendered the page', page_cache.misses),
+        gauge('voting_elections', 'Election shards on this node, the default election included', len(elections.items())),
+    ]
+    return app.response_class('\n'.join(sections) + '\n', mimetype='text/plain; version=0.0.4')
+
+PAGE_TEMPLATES['analysis.html'] = '''
     <!doctype html>
     <html lang="en">
     <head>
@@ -1336,8 +4343,8 @@ def blockchain_analysis():
         <meta name="viewport" content="width=device-width, initial-scale=1">
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
         <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+        <link rel="stylesheet" href="{{ asset_url('base.css') }}">
         <style>
-            ''' + BASE_CSS + '''
             .analysis-container {
                 max-width: 800px;
                 margin: auto;
@@ -1377,10 +4384,13 @@ def blockchain_analysis():
                 color: #4776E6;
                 margin-bottom: 5px;
             }
+            .dark-mode .table {
+                color: #f8f9fa;
+            }
         </style>
     </head>
     <body>
-    ''' + NAVBAR_TEMPLATE.replace('{{ active_page }}', '') + '''
+    {% include 'navbar.html' %}
     
     <div class="container analysis-container">
         <div class="text-center mb-5">
@@ -1413,6 +4423,33 @@ def blockchain_analysis():
             </div>
         </div>
         
+        <div class="card shadow-lg p-4 mb-4">
+            <h4 class="mb-4">Measured Performance</h4>
+            <p class="text-muted">Percentiles of the last {{ window }} samples of each measurement since this node started. Full histograms are at <a href="/metrics">/metrics</a>.</p>
+            <table class="table table-sm">
+                <thead><tr><th>Measurement</th><th class="text-end">p50</th><th class="text-end">p95</th><th class="text-end">p99</th></tr></thead>
+                <tbody>
+                {% for row in measurements %}
+                <tr><td>{{ row.label }}</td><td class="text-end">{{ row.p50 }}</td><td class="text-end">{{ row.p95 }}</td><td class="text-end">{{ row.p99 }}</td></tr>
+                {% endfor %}
+                </tbody>
+            </table>
+            
+            <h5 class="mt-3 mb-3">Request latency by route</h5>
+            {% if routes %}
+            <table class="table table-sm">
+                <thead><tr><th>Route</th><th class="text-end">Requests</th><th class="text-end">p50</th><th class="text-end">p95</th><th class="text-end">p99</th></tr></thead>
+                <tbody>
+                {% for row in routes %}
+                <tr><td><code>{{ row.method }} {{ row.route }}</code></td><td class="text-end">{{ row.count }}</td><td class="text-end">{{ row.p50 }}</td><td class="text-end">{{ row.p95 }}</td><td class="text-end">{{ row.p99 }}</td></tr>
+                {% endfor %}
+                </tbody>
+            </table>
+            {% else %}
+            <p class="text-muted">No requests measured yet.</p>
+            {% endif %}
+        </div>
+        
         <div class="card shadow-lg p-4 mb-4">
             <h4 class="mb-4">Security Analysis</h4>
             
@@ -1464,59 +4501,43 @@ def blockchain_analysis():
     </div>
     
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    ''' + DARK_MODE_JS + '''
+    <script src="{{ asset_url('dark-mode.js') }}"></script>
     </body>
     </html>
-    ''', total_blocks=total_blocks, total_votes=total_votes, difficulty=voting_chain.difficulty)
-
-# Add a link to the analysis page in the navbar
-NAVBAR_TEMPLATE = '''
-<nav class="navbar navbar-expand-lg navbar-dark mb-4">
-    <div class="container">
-        <a class="navbar-brand" href="/"><i class="fas fa-vote-yea me-2"></i>Blockchain Voting</a>
-        <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-            <span class="navbar-toggler-icon"></span>
-        </button>
-        <div class="collapse navbar-collapse" id="navbarNav">
-            <ul class="navbar-nav me-auto">
-                <li class="nav-item">
-                    <a class="nav-link {{ 'active' if active_page == 'home' }}" href="/"><i class="fas fa-home me-1"></i> Home</a>
-                </li>
-                <li class="nav-item">
-                    <a class="nav-link {{ 'active' if active_page == 'results' }}" href="/results"><i class="fas fa-chart-pie me-1"></i> Results</a>
-                </li>
-                <li class="nav-item">
-                    <a class="nav-link {{ 'active' if active_page == 'chain' }}" href="/chain"><i class="fas fa-link me-1"></i> Blockchain</a>
-                </li>
-                <li class="nav-item">
-                    <a class="nav-link {{ 'active' if active_page == 'candidates' }}" href="/candidates"><i class="fas fa-users-cog me-1"></i> Candidates</a>
-                </li>
-                <li class="nav-item">
-                    <a class="nav-link {{ 'active' if active_page == 'analysis' }}" href="/analysis"><i class="fas fa-chart-line me-1"></i> Analysis</a>
-                </li>
-            </ul>
-            <div class="theme-toggle" id="theme-toggle" title="Toggle Dark Mode">
-                <i class="fas fa-moon"></i>
-            </div>
-        </div>
-    </div>
-</nav>
-'''
+    '''
 
-# Add a security enhancement route to adjust mining difficulty
-@app.route('/admin/settings', methods=['GET', 'POST'])
-def admin_settings():
-    message = None
+# Add a route to analyze blockchain security and performance
+@app.route('/analysis')
+def blockchain_analysis():
+    total_blocks = len(voting_chain.chain)
+    total_votes = voting_chain.get_total_votes()
     
-    if request.method == 'POST':
-        new_difficulty = int(request.form.get('difficulty', 2))
-        if 1 <= new_difficulty <= 5:  # Limit difficulty range for usability
-            voting_chain.difficulty = new_difficulty
-            message = {'type': 'success', 'text': f'Mining difficulty updated to {new_difficulty}', 'icon': 'check-circle'}
+    def row(label, histogram, labels=(), unit='ms'):
+        values = histogram.percentiles(labels)
+        if values is None:
+            return {'label': label, 'p50': '-', 'p95': '-', 'p99': '-'}
+        if unit == 'ms':
+            formatted = [f'{value * 1e6:,.0f} µs' if value < 0.001 else f'{value * 1000:,.2f} ms' for value in values]
         else:
-            message = {'type': 'danger', 'text': 'Difficulty must be between 1 and 5', 'icon': 'exclamation-circle'}
+            formatted = [f'{value:,.0f}{unit}' for value in values]
+        return dict(zip(('p50', 'p95', 'p99'), formatted), label=label)
+    
+    # Everything below is measured by this node, not estimated
+    measurements = [
+        row('Mining time per block', MINING_SECONDS),
+        row('Nonce attempts per block', NONCE_ATTEMPTS, unit=''),
+        row('Hash rate', HASH_RATE, unit=' H/s'),
+        row('Chain lock wait (add_vote)', LOCK_WAIT, ('chain', 'add_vote')),
+        row('Chain lock wait (commit block)', LOCK_WAIT, ('chain', 'commit')),
+        row('Mining lock wait', LOCK_WAIT, ('mining', 'mine_and_commit')),
+    ]
+    routes = [dict(row(route, REQUEST_SECONDS, (route, method)), route=route, method=method, count=count)
+              for (route, method), count in sorted(REQUEST_SECONDS.counts().items())]
     
-    return render_template_string('''
+    return render_template('analysis.html', total_blocks=total_blocks, total_votes=total_votes, difficulty=voting_chain.difficulty,
+                           measurements=measurements, routes=routes, window=Histogram.WINDOW)
+
+PAGE_TEMPLATES['admin_settings.html'] = '''
     <!doctype html>
     <html lang="en">
     <head>
@@ -1525,8 +4546,8 @@ def admin_settings():
         <meta name="viewport" content="width=device-width, initial-scale=1">
         <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
         <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
+        <link rel="stylesheet" href="{{ asset_url('base.css') }}">
         <style>
-            ''' + BASE_CSS + '''
             .settings-card {
                 max-width: 750px;
                 margin: auto;
@@ -1553,7 +4574,7 @@ def admin_settings():
         </style>
     </head>
     <body>
-    ''' + NAVBAR_TEMPLATE.replace('{{ active_page }}', '') + '''
+    {% include 'navbar.html' %}
     
     <div class="container settings-card">
         <div class="text-center mb-4">
@@ -1593,6 +4614,33 @@ def admin_settings():
                 </form>
             </div>
             
+            <div class="setting-item">
+                <div class="setting-title"><i class="fas fa-layer-group me-2"></i>Vote Batching</div>
+                <p>Queue votes in the pending pool and seal them into one block when the batch is full or the time limit expires. A batch size of 1 mines every vote immediately.</p>
+                
+                <form action="/admin/settings" method="post">
+                    <input type="hidden" name="action" value="batching">
+                    <div class="row">
+                        <div class="col-md-6 mb-3">
+                            <label for="batch_size" class="form-label">Votes per block</label>
+                            <input type="number" class="form-control" min="1" max="10000" id="batch_size" name="batch_size" value="{{ batch_size }}">
+                        </div>
+                        <div class="col-md-6 mb-3">
+                            <label for="batch_timeout" class="form-label">Time limit (seconds)</label>
+                            <input type="number" class="form-control" min="0.1" max="300" step="0.1" id="batch_timeout" name="batch_timeout" value="{{ batch_timeout }}">
+                        </div>
+                    </div>
+                    <button type="submit" class="btn btn-primary">Update Batching</button>
+                </form>
+                
+                <form action="/admin/settings" method="post" class="mt-3">
+                    <input type="hidden" name="action" value="flush">
+                    <button type="submit" class="btn btn-outline-primary">
+                        <i class="fas fa-cube me-2"></i> Seal {{ pending_votes }} pending votes now
+                    </button>
+                </form>
+            </div>
+            
             <div class="setting-item">
                 <div class="setting-title"><i class="fas fa-info-circle me-2"></i>Current Blockchain Status</div>
                 <div class="row mt-3">
@@ -1609,6 +4657,32 @@ def admin_settings():
                         <div>{{ "Yes" if is_valid else "No" }}</div>
                     </div>
                 </div>
+                <div class="row mt-3">
+                    <div class="col-md-4">
+                        <div class="mb-2"><strong>Miner:</strong></div>
+                        <div>{{ miner_name }}</div>
+                    </div>
+                    <div class="col-md-4">
+                        <div class="mb-2"><strong>Last Hash Rate:</strong></div>
+                        <div>{{ "{:,.0f}".format(hashrate) }} H/s</div>
+                    </div>
+                    <div class="col-md-4">
+                        <div class="mb-2"><strong>Verified Height:</strong></div>
+                        <div>{{ verified_height }}</div>
+                    </div>
+                </div>
+            </div>
+            
+            <div class="setting-item">
+                <div class="setting-title"><i class="fas fa-shield-alt me-2"></i>Full Chain Verification</div>
+                <p>Page loads only verify blocks added since the last trusted checkpoint. Run a full audit to re-hash every block in the background.</p>
+                <div class="progress mb-2">
+                    <div class="progress-bar" id="verifyProgress" role="progressbar" style="width: 0%"></div>
+                </div>
+                <div class="mb-3" id="verifyStatus">No full verification has run yet.</div>
+                <button type="button" class="btn btn-outline-primary" id="verifyStart">
+                    <i class="fas fa-play me-2"></i> Start Full Verification
+                </button>
             </div>
         </div>
         
@@ -1618,17 +4692,286 @@ def admin_settings():
     </div>
     
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
-    ''' + DARK_MODE_JS + '''
+    <script src="{{ asset_url('dark-mode.js') }}"></script>
     <script>
         // Update difficulty value display
         document.getElementById('difficulty').addEventListener('input', function() {
             document.getElementById('difficultyValue').textContent = this.value;
         });
+        
+        // Poll the background full-verification job
+        function showVerification(job) {
+            if (!job || !job.state) return;
+            const percent = job.total ? Math.round(job.checked / job.total * 100) : 100;
+            document.getElementById('verifyProgress').style.width = (job.state === 'running' ? percent : 100) + '%';
+            const status = document.getElementById('verifyStatus');
+            if (job.state === 'running') {
+                status.textContent = `Checked ${job.checked} of ${job.total} blocks...`;
+                setTimeout(pollVerification, 1000);
+            } else if (job.valid) {
+                status.textContent = `Chain valid: all ${job.total} blocks verified.`;
+            } else {
+                status.textContent = `Invalid block #${job.invalid_index}: ${job.reason}`;
+            }
+        }
+        function pollVerification() {
+            fetch('/admin/verify').then(response => response.json()).then(data => showVerification(data.job));
+        }
+        document.getElementById('verifyStart').addEventListener('click', function() {
+            fetch('/admin/verify', {method: 'POST'}).then(response => response.json()).then(data => showVerification(data.job));
+        });
+        pollVerification();
     </script>
     </body>
     </html>
-    ''', current_difficulty=voting_chain.difficulty, total_blocks=len(voting_chain.chain), 
-        total_votes=len(voting_chain.voters), is_valid=voting_chain.is_chain_valid())
+    '''
+
+# Add a security enhancement route to adjust mining difficulty
+@app.route('/admin/settings', methods=['GET', 'POST'])
+def admin_settings():
+    message = None
+    
+    action = request.form.get('action', 'difficulty')
+    
+    if request.method == 'POST' and action == 'difficulty':
+        new_difficulty = int(request.form.get('difficulty', 2))
+        if voting_chain.min_difficulty <= new_difficulty <= 5:  # Limit difficulty range for usability
+            voting_chain.difficulty = new_difficulty
+            message = {'type': 'success', 'text': f'Mining difficulty updated to {new_difficulty}', 'icon': 'check-circle'}
+        else:
+            message = {'type': 'danger', 'text': f'Difficulty must be between {voting_chain.min_difficulty} and 5', 'icon': 'exclamation-circle'}
+    
+    elif request.method == 'POST' and action in ('batching', 'flush') and not session.get('admin_authenticated', False):
+        # Same admin session as /candidates: these change how (and when) every vote is sealed
+        message = {'type': 'danger', 'text': 'Admin login required. Sign in on the Candidates page.', 'icon': 'exclamation-circle'}
+    
+    elif request.method == 'POST' and action == 'batching':
+        try:
+            new_batch_size = int(request.form.get('batch_size', 1))
+            new_batch_timeout = float(request.form.get('batch_timeout', 5))
+        except ValueError:
+            new_batch_size, new_batch_timeout = 0, 0
+        if 1 <= new_batch_size <= 10000 and 0 < new_batch_timeout <= 300:
+            voting_chain.batch_size = new_batch_size
+            voting_chain.batch_timeout = new_batch_timeout
+            message = {'type': 'success', 'text': f'Batching updated to {new_batch_size} votes / {new_batch_timeout}s per block', 'icon': 'check-circle'}
+        else:
+            message = {'type': 'danger', 'text': 'Batch size must be 1-10000 and time limit 0-300 seconds', 'icon': 'exclamation-circle'}
+    
+    elif request.method == 'POST' and action == 'flush':
+        block = voting_chain.flush_pending()
+        if block:
+            message = {'type': 'success', 'text': f'Sealed {len(Blockchain.block_votes(block))} pending votes into block #{block.index}', 'icon': 'check-circle'}
+        else:
+            message = {'type': 'info', 'text': 'No pending votes to seal', 'icon': 'info-circle'}
+    
+    miner = voting_chain.get_miner(voting_chain.difficulty)
+    
+    return render_template('admin_settings.html', current_difficulty=voting_chain.difficulty, total_blocks=len(voting_chain.chain), 
+        total_votes=voting_chain.get_total_votes(), is_valid=voting_chain.verify_incremental(),
+        batch_size=voting_chain.batch_size, batch_timeout=voting_chain.batch_timeout,
+        pending_votes=len(voting_chain.pending_transactions), message=message,
+        miner_name=type(miner).__name__, hashrate=miner.last_hashrate,
+        verified_height=voting_chain.checkpoint[0])
+
+# -------------------------
+# CLI Commands (flask --app blockchain <command>)
+# -------------------------
+
+@app.cli.command('verify-chain')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Worker processes; 1 verifies serially.')
+@click.option('--shard-size', default=10000, show_default=True, help='Blocks per worker task.')
+def verify_chain_command(workers, shard_size):
+    """Re-verify every block and report the first invalid one."""
+    start = time.perf_counter()
+    if workers > 1:
+        failure = verify_chain_parallel(voting_chain.chain, workers, shard_size, difficulty=voting_chain.min_difficulty)
+    else:
+        failure = voting_chain.find_invalid_block()
+    elapsed = time.perf_counter() - start
+    if failure:
+        click.echo(f"Invalid block #{failure[0]}: {failure[1]}")
+        raise SystemExit(1)
+    click.echo(f"Chain valid: {len(voting_chain.chain) - 1} blocks verified in {elapsed:.2f}s with {workers} worker(s)")
+
+@app.cli.command('import-votes')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), help='Defaults to csv for .csv files, else ndjson.')
+@click.option('--chunk-size', default=BULK_CHUNK_SIZE, show_default=True, help='Votes sealed per block.')
+@click.option('--url', help='Upload to a running node (e.g. http://127.0.0.1:5000) instead of the local chain.')
+@click.option('--report', type=click.File('w'), default='-', help='Per-record NDJSON report destination.')
+def import_votes_command(path, fmt, chunk_size, url, report):
+    """Import a polling station's NDJSON or CSV vote file."""
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    chunk_size = min(max(chunk_size, 1), BULK_MAX_CHUNK_SIZE)
+    totals = {'accepted': 0, 'duplicate': 0, 'invalid': 0}
+    start = time.perf_counter()
+    if url:
+        headers = {'Content-Type': 'text/csv' if fmt == 'csv' else 'application/x-ndjson'}
+        if BULK_UPLOAD_TOKEN:
+            headers['X-Upload-Token'] = BULK_UPLOAD_TOKEN
+        with open(path, 'rb') as upload:
+            response = requests.post(f"{url.rstrip('/')}/api/votes/bulk", data=upload, headers=headers,
+                                     params={'format': fmt, 'chunk_size': chunk_size}, stream=True)
+        response.raise_for_status()
+        for line in response.iter_lines():
+            result = json.loads(line)
+            if 'summary' in result:
+                totals = result['summary']
+            else:
+                report.write(line.decode() + '\n')
+    else:
+        with open(path, encoding='utf-8', newline='') as lines:
+            for result in ingest_votes(voting_chain, iter_vote_records(lines, fmt), chunk_size):
+                totals[result['status']] += 1
+                report.write(json.dumps(result) + '\n')
+    elapsed = time.perf_counter() - start
+    click.echo(f"{totals['accepted']} accepted, {totals['duplicate']} duplicate, {totals['invalid']} invalid "
+               f"in {elapsed:.2f}s", err=True)
+
+# -------------------------
+# Async Serving
+# -------------------------
+
+class AsgiInput(io.RawIOBase):
+    """Request body for a view running on a pool thread, pulled from the ASGI receive channel as it is read.
+    
+    Uploads such as /api/votes/bulk are parsed while they arrive instead of being buffered whole.
+    """
+    
+    def __init__(self, receive, loop):
+        self.receive = receive
+        self.loop = loop
+        self.pending = b''
+        self.more_body = True
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, target):
+        while not self.pending and self.more_body:
+            message = asyncio.run_coroutine_threadsafe(self.receive(), self.loop).result()
+            if message['type'] == 'http.disconnect':
+                self.more_body = False
+                break
+            self.pending = message.get('body', b'')
+            self.more_body = message.get('more_body', False)
+        size = min(len(target), len(self.pending))
+        target[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+class AsgiBridge:
+    """ASGI front end for the Flask app: an event loop owns the connections, a thread pool runs the views.
+    
+    asgiref's WsgiToAsgi funnels every request through one shared thread, which would serialise the
+    whole app, so each request here gets its own pool worker. Streamed responses such as /chain are
+    pulled from the view in ~64 KB pieces, and request bodies reach the view as they arrive.
+    """
+    
+    CHUNK_BYTES = 64 * 1024
+    
+    def __init__(self, wsgi_app, workers=32):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asgi')
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    self.executor.shutdown(wait=False)
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+        
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.respond, scope, AsgiInput(receive, loop), send, loop)
+    
+    def respond(self, scope, body, send, loop):
+        """Run the view and stream its response from one pool thread.
+        
+        Views using stream_with_context keep the request context in thread-local context variables,
+        so the response must be iterated and closed on the thread that started it.
+        """
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+        
+        started = {}
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        
+        response = self.wsgi_app(self.environ(scope, body), start_response)
+        chunks = iter(response)
+        try:
+            data, done = self._read_chunk(chunks)
+            emit({'type': 'http.response.start', 'status': started['status'], 'headers': started['headers']})
+            while not done:
+                emit({'type': 'http.response.body', 'body': data, 'more_body': True})
+                data, done = self._read_chunk(chunks)
+            emit({'type': 'http.response.body', 'body': data})
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+    
+    def _read_chunk(self, chunks):
+        """Next ~CHUNK_BYTES of the response body, and whether the body is finished"""
+        parts = []
+        size = 0
+        for part in chunks:
+            parts.append(part)
+            size += len(part)
+            if size >= self.CHUNK_BYTES:
+                return b''.join(parts), False
+        return b''.join(parts), True
+    
+    @staticmethod
+    def environ(scope, body):
+        """WSGI environ for an ASGI http scope, reading the request body from the `body` stream"""
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BufferedReader(body, AsgiBridge.CHUNK_BYTES),
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1')
+            value = value.decode('latin-1')
+            if name == 'content-type':
+                environ['CONTENT_TYPE'] = value
+            elif name == 'content-length':
+                environ['CONTENT_LENGTH'] = value
+            else:
+                key = 'HTTP_' + name.upper().replace('-', '_')
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+# Serve with any ASGI server, e.g. `uvicorn blockchain:asgi_app` (one process: the chain lives in memory)
+asgi_app = AsgiBridge(app)
+
+def serve_asgi(port):
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("SERVER=asgi needs uvicorn: pip install uvicorn")
+    uvicorn.run(asgi_app, host="0.0.0.0", port=port, log_level="warning")
 
 # -------------------------
 # Run the App (Render Compatible)
@@ -1636,4 +4979,7 @@ def admin_settings():
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port)
+    if os.environ.get("SERVER") == "asgi":
+        serve_asgi(port)
+    else:
+        app.run(host="0.0.0.0", port=port)
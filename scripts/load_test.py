@@ -0,0 +1,111 @@
+"""Compare throughput and tail latency of the serving modes under concurrent voters.
+
+Run from the repository root:
+
+    python scripts/load_test.py [seconds] [clients] [difficulty]
+
+Each mode starts `python blockchain.py` on its own port:
+
+    flask, inline  - the development server, mining every vote inside the request
+    flask          - the development server, votes answered once queued
+    asgi           - SERVER=asgi under uvicorn, votes answered once queued
+
+Clients send a mix of /process_vote (new voter each time), /results and /chain?limit=20
+over keep-alive sessions. The script reports requests/s, p50 and p99 latency over all
+requests, and p99 for vote submissions alone.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = [
+    ('flask, inline', {'SEAL_IN_BACKGROUND': '0'}),
+    ('flask', {}),
+    ('asgi', {'SERVER': 'asgi'}),
+]
+# Two reads per vote, roughly what a results page refreshing during voting looks like
+REQUEST_MIX = ['vote', 'results', 'chain']
+
+
+def wait_until_up(base_url, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(f'{base_url}/results', timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{base_url} did not start')
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def client(base_url, client_id, deadline, latencies, vote_latencies, errors):
+    session = requests.Session()
+    sent = 0
+    while time.time() < deadline:
+        kind = REQUEST_MIX[sent % len(REQUEST_MIX)]
+        start = time.perf_counter()
+        try:
+            if kind == 'vote':
+                response = session.post(f'{base_url}/process_vote',
+                                        json={'voter_id': f'load-{client_id}-{sent}', 'vote': 0})
+            elif kind == 'results':
+                response = session.get(f'{base_url}/results')
+            else:
+                response = session.get(f'{base_url}/chain', params={'limit': 20})
+            response.content
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except requests.RequestException as error:
+            errors.append(type(error).__name__)
+        latencies.append(time.perf_counter() - start)
+        if kind == 'vote':
+            vote_latencies.append(latencies[-1])
+        sent += 1
+
+
+def run_mode(port, env, seconds, clients, difficulty):
+    base_url = f'http://127.0.0.1:{port}'
+    process = subprocess.Popen([sys.executable, 'blockchain.py'], cwd=ROOT,
+                               env=dict(os.environ, PORT=str(port), **env),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(base_url)
+        requests.post(f'{base_url}/admin/settings', data={'action': 'difficulty', 'difficulty': difficulty})
+        latencies, vote_latencies, errors = [], [], []
+        deadline = time.time() + seconds
+        threads = [threading.Thread(target=client, args=(base_url, i, deadline, latencies, vote_latencies, errors))
+                   for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return (len(latencies) / seconds, percentile(latencies, 0.5), percentile(latencies, 0.99),
+                percentile(vote_latencies, 0.99), len(errors))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    difficulty = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    print(f'{seconds:g}s per mode, {clients} clients, difficulty {difficulty}')
+    print(f"{'mode':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'vote p99 ms':>13}{'errors':>8}")
+    for offset, (name, env) in enumerate(MODES):
+        rate, p50, p99, vote_p99, errors = run_mode(5201 + offset, env, seconds, clients, difficulty)
+        print(f'{name:<16}{rate:>10,.0f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}{vote_p99 * 1000:>13.1f}{errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
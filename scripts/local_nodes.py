@@ -0,0 +1,87 @@
+"""Start a few local nodes, register them as peers, vote on one and sync the others.
+
+Run from the repository root:
+
+    python scripts/local_nodes.py [nodes] [votes]
+
+Each node is `python blockchain.py` on its own PORT (5001, 5002, ...), sharing a random
+NODE_SYNC_TOKEN that the script also sends on peer endpoints. After voting on
+the first node, the script waits for gossip to spread the new blocks, falls back to
+/nodes/resolve on the other nodes, and checks that all tips match.
+"""
+import os
+import secrets
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_PORT = 5001
+GOSSIP_WAIT = 5.0
+TOKEN = secrets.token_hex(16)
+HEADERS = {'X-Node-Token': TOKEN}
+
+
+def tip_hashes(addresses):
+    return {requests.get(f'http://{address}/sync/status', headers=HEADERS).json()['tip_hash'] for address in addresses}
+
+
+def wait_until_up(address, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(f'http://{address}/sync/status', timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f'{address} did not start')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    votes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    addresses = [f'127.0.0.1:{BASE_PORT + i}' for i in range(count)]
+    processes = [
+        subprocess.Popen([sys.executable, 'blockchain.py'], cwd=ROOT,
+                         env=dict(os.environ, PORT=str(BASE_PORT + i), NODE_SYNC_TOKEN=TOKEN),
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for i in range(count)
+    ]
+    try:
+        for address in addresses:
+            wait_until_up(address)
+        for address in addresses:
+            peers = [peer for peer in addresses if peer != address]
+            requests.post(f'http://{address}/nodes/register', json={'nodes': peers},
+                          headers=HEADERS).raise_for_status()
+
+        for i in range(votes):
+            requests.post(f'http://{addresses[0]}/process_vote',
+                          json={'voter_id': f'cluster-{i:05d}', 'vote': 0}).raise_for_status()
+
+        # Blocks are gossiped as they are mined, so the nodes usually converge without a resolve
+        start = time.perf_counter()
+        while time.perf_counter() - start < GOSSIP_WAIT and len(tip_hashes(addresses)) > 1:
+            time.sleep(0.1)
+        if len(tip_hashes(addresses)) == 1:
+            print(f'converged by gossip in {time.perf_counter() - start:.2f}s')
+        else:
+            start = time.perf_counter()
+            for address in addresses[1:]:
+                print(address, requests.post(f'http://{address}/nodes/resolve', headers=HEADERS).json())
+            print(f'resolved {count - 1} nodes in {time.perf_counter() - start:.2f}s')
+
+        tips = tip_hashes(addresses)
+        print('tips match' if len(tips) == 1 else f'tips diverge: {tips}')
+        return 0 if len(tips) == 1 else 1
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
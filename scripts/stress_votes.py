@@ -0,0 +1,103 @@
+"""Concurrency stress check for Blockchain.add_vote.
+
+Run from the repository root:
+
+    python scripts/stress_votes.py [threads] [rounds]
+
+Each round starts many threads on a barrier and has them submit the same voter ID at
+once; exactly one submission may succeed. A second phase mixes distinct voters with
+candidate changes, then checks the chain, the tally index and the voter index agree.
+Both inline mining and background sealing are exercised.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')  # Skip block_mined records
+
+from blockchain import Blockchain, VoterRegistry, voter_digest  # noqa: E402
+
+
+class YieldingRegistry(VoterRegistry):
+    """Voter registry that sleeps after every membership test, widening check-then-add races"""
+
+    def __contains__(self, voter_id):
+        found = super().__contains__(voter_id)
+        time.sleep(0.001)  # Hold the window between this check and whatever the caller does next
+        return found
+
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        barrier.wait()
+        results[i] = target(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def vote(voter_id, candidate=0):
+    return {'voter_id': voter_id, 'vote': candidate, 'timestamp': time.time()}
+
+
+def settle(chain):
+    """Wait for the background sealer to drain pending votes"""
+    chain.sealer.submit(lambda: None).result()
+    chain.flush_pending()
+
+
+def check_same_voter(chain, threads, rounds):
+    for round_number in range(rounds):
+        voter_id = f'same-{round_number}'
+        accepted = run_threads(threads, lambda i: chain.add_vote(vote(voter_id)))
+        assert accepted.count(True) == 1, f'{voter_id}: {accepted.count(True)} submissions accepted'
+    settle(chain)
+    for round_number in range(rounds):
+        assert chain.voter_blocks.get(voter_digest(f'same-{round_number}')) is not None
+    assert chain.get_total_votes() == rounds, chain.get_vote_counts()
+
+
+def check_mixed(chain, threads):
+    def work(i):
+        if i % 8 == 0:
+            return chain.add_candidate(f'Write-in {i}')
+        return chain.add_vote(vote(f'mixed-{i}', i % 3))
+
+    before = chain.get_total_votes()
+    results = run_threads(threads, work)
+    assert all(results), results
+    settle(chain)
+    expected_votes = sum(1 for i in range(threads) if i % 8)
+    assert chain.get_total_votes() == before + expected_votes, chain.get_vote_counts()
+    assert all(f'Write-in {i}' in chain.candidates for i in range(0, threads, 8))
+    assert chain.is_chain_valid(), 'chain failed verification'
+    assert chain.is_tally_consistent(), 'tally index disagrees with the chain'
+
+
+def main():
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible to widen race windows
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for mode, background in (('inline', False), ('background', True)):
+        chain = Blockchain(voter_registry=YieldingRegistry)
+        chain.seal_in_background = background
+        start = time.perf_counter()
+        check_same_voter(chain, threads, rounds)
+        check_mixed(chain, threads)
+        elapsed = time.perf_counter() - start
+        print(f'{mode}: {rounds} rounds x {threads} threads on one voter ID, then {threads} mixed writers '
+              f'-> ok in {elapsed:.2f}s ({len(chain.chain)} blocks)')
+        chain.sealer.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Route input handling: malformed form and path values get a client error, never a 500."""
+import hashlib
+import json
+import os
+import sys
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import blockchain  # noqa: E402
+from blockchain import Blockchain  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    chain = Blockchain()
+    chain.seal_in_background = False
+    monkeypatch.setattr(blockchain, 'voting_chain', chain)
+    monkeypatch.setitem(blockchain.elections.shards, 'default', chain)
+    return blockchain.app.test_client()
+
+
+def test_vote_form_rejects_non_ascii_digits(client):
+    response = client.post('/vote', data={'voter_id': 'v1', 'vote': '²'})
+    assert response.status_code == 302
+    assert blockchain.voting_chain.get_total_votes() == 0
+
+
+def test_api_block_rejects_non_ascii_digits(client):
+    assert client.get('/api/blocks/%C2%B2').status_code == 404
+    assert client.get('/api/blocks/0').get_json()['index'] == 0
+
+
+def test_chain_page_defaults_to_api_page_size(client, monkeypatch):
+    monkeypatch.setattr(blockchain, 'API_PAGE_SIZE', 3)
+    for voter in range(5):
+        blockchain.voting_chain.add_vote({'voter_id': f'v{voter}', 'vote': 0, 'timestamp': 1.0})
+    page = client.get('/chain').get_data(as_text=True)
+    assert 'after=2&amp;limit=3' in page or 'after=2&limit=3' in page
+
+
+def test_batching_and_flush_need_admin_login(client):
+    chain = blockchain.voting_chain
+    chain.batch_size = 10
+    chain.add_vote({'voter_id': 'queued', 'vote': 0, 'timestamp': 1.0})
+    client.post('/admin/settings', data={'action': 'batching', 'batch_size': '1', 'batch_timeout': '5'})
+    client.post('/admin/settings', data={'action': 'flush'})
+    assert chain.batch_size == 10 and len(chain.pending_transactions) == 1
+
+    with client.session_transaction() as session:
+        session['admin_authenticated'] = True
+    client.post('/admin/settings', data={'action': 'flush'})
+    assert not chain.pending_transactions and chain.get_total_votes() == 1
+
+
+def test_single_vote_proof_recomputes_block_hash(client):
+    client.post('/process_vote', json={'voter_id': 'v1', 'vote': 1})
+    receipt = blockchain.vote_receipt(blockchain.voting_chain.chain[-1].vote_data)
+    proof = client.get(f'/proof/{receipt}').get_json()
+    assert blockchain.vote_receipt(json.loads(proof['vote_json'])) == receipt
+    header = f"{proof['block_index']}{proof['timestamp']}{proof['vote_json']}{proof['previous_hash']}{proof['nonce']}"
+    assert hashlib.sha256(header.encode()).hexdigest() == proof['block_hash']
+
+
+def test_csv_upload_takes_decimal_candidate_ids(client):
+    body = 'voter_id,vote\nc1,Candidate A\nc2,1\nc3, 2\nc4,²\n'
+    response = client.post('/api/votes/bulk?format=csv', data=body, content_type='text/csv')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line.get('status') for line in lines[:-1]] == ['accepted', 'accepted', 'accepted', 'invalid']
+    assert blockchain.voting_chain.get_vote_counts() == {'Candidate A': 1, 'Candidate B': 1, 'Candidate C': 1}
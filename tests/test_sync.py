@@ -0,0 +1,126 @@
+"""Blocks built by this node's own vote routes must pass a peer's sync checks."""
+import gzip
+import json
+import os
+import sys
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+import blockchain  # noqa: E402
+from blockchain import Blockchain  # noqa: E402
+
+TOKEN = 'test-token'
+
+
+@pytest.fixture
+def source(monkeypatch):
+    """A chain served as voting_chain, with peers fetching from it through the test client"""
+    chain = Blockchain()
+    chain.seal_in_background = False
+    monkeypatch.setattr(blockchain, 'voting_chain', chain)
+    monkeypatch.setitem(blockchain.elections.shards, 'default', chain)
+    monkeypatch.setattr(blockchain, 'NODE_SYNC_TOKEN', TOKEN)
+    client = blockchain.app.test_client()
+
+    def peer_get(self, node, path, **params):
+        response = client.get(path, query_string=params,
+                              headers={'X-Node-Token': TOKEN, 'Accept-Encoding': 'gzip'})
+        data = response.data
+        if response.headers.get('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return json.loads(data)
+
+    monkeypatch.setattr(Blockchain, '_peer_get', peer_get)
+    return chain, client
+
+
+def test_route_ballots_sync_to_peers(source):
+    chain, client = source
+    client.post('/vote', data={'voter_id': ' v3 ', 'vote': '1'})
+    client.post('/process_vote', json={'voter_id': 42, 'vote': 0})
+    client.post('/elections/default/vote', json={'voter_id': 'v5\t', 'vote': 'Candidate C'})
+    client.post('/ballots', json={'voter_id': 7, 'votes': {'default': 2}})
+    assert chain.get_total_votes() == 4
+
+    peer = Blockchain()
+    peer.register_node('http://source:5000')
+    assert peer.resolve_conflicts() == 'source:5000'
+    assert peer.chain[-1].hash == chain.chain[-1].hash
+    assert peer.get_vote_counts() == chain.get_vote_counts()
+    assert {vote['voter_id'] for block in peer.chain for vote in Blockchain.block_votes(block)} == {'v3', '42', 'v5', '7'}
+
+
+def test_synced_candidate_survives_snapshot_restart(source, tmp_path):
+    chain, client = source
+    chain.add_candidate('Dana')
+    client.post('/process_vote', json={'voter_id': 'd1', 'vote': 3})
+
+    peer = Blockchain(storage=blockchain.ChainStore(str(tmp_path), snapshot_every=2))
+    peer.register_node('http://source:5000')
+    assert peer.resolve_conflicts() == 'source:5000'
+    peer.storage.close()
+
+    restarted = Blockchain(storage=blockchain.ChainStore(str(tmp_path), snapshot_every=2))
+    assert restarted.get_vote_counts()['Dana'] == 1
+    assert restarted.unresolved_votes == 0
+    assert restarted.is_tally_consistent()
+    restarted.storage.close()
+
+
+def test_fork_keeps_prefix_and_requeues_orphaned_votes(source, tmp_path):
+    chain, client = source
+    for voter in ('a1', 'a2'):
+        client.post('/process_vote', json={'voter_id': voter, 'vote': 0})
+
+    peer = Blockchain(storage=blockchain.ChainStore(str(tmp_path), snapshot_every=2))
+    peer.seal_in_background = False
+    peer.register_node('http://source:5000')
+    assert peer.resolve_conflicts() == 'source:5000'
+    peer.add_candidate('Eve')
+    peer.add_vote({'voter_id': 'p1', 'vote': 3, 'timestamp': 1.0})
+    assert peer.verify_incremental() and peer.checkpoint[0] == 5
+    prefix_offsets = list(peer.storage.offsets[:3])
+    for voter in ('b1', 'b2', 'b3', 'b4'):
+        client.post('/process_vote', json={'voter_id': voter, 'vote': 1})
+
+    assert peer.resolve_conflicts() == 'source:5000'
+    # The fork cut the log back to block 3 and kept the checkpoint at the cut
+    assert list(peer.storage.offsets[:3]) == prefix_offsets
+    assert peer.checkpoint[0] == 3
+    # Eve isn't on the adopted chain, so the orphaned ballot for her is dropped
+    assert 'Eve' not in peer.get_vote_counts() and peer.get_total_votes() == 6
+    assert peer.is_tally_consistent() and peer.verify_incremental()
+    assert peer.voter_blocks.get(blockchain.voter_digest('p1')) is None
+    tip = peer.chain[-1].hash
+    peer.storage.close()
+
+    restarted = Blockchain(storage=blockchain.ChainStore(str(tmp_path), snapshot_every=2))
+    assert restarted.chain[-1].hash == tip
+    assert restarted.get_vote_counts() == {'Candidate A': 2, 'Candidate B': 4, 'Candidate C': 0}
+    assert restarted.is_tally_consistent() and restarted.is_chain_valid()
+    restarted.storage.close()
+
+
+def test_unmasked_output_refused_without_node_token(source, monkeypatch):
+    chain, client = source
+    client.post('/process_vote', json={'voter_id': 'secret-voter', 'vote': 0})
+    receipt = blockchain.vote_receipt(chain.chain[-1].vote_data)
+    monkeypatch.setattr(blockchain, 'NODE_SYNC_TOKEN', '')
+    for path in ('/export/chain.ndjson?raw=1', '/sync/blocks', f'/gossip/votes/{receipt}'):
+        assert client.get(path).status_code == 403
+        assert client.get(path, headers={'X-Node-Token': ''}).status_code == 403
+    assert b'secret-voter' not in client.get('/export/chain.ndjson').data
+
+
+def test_gossip_cannot_name_a_self_registered_origin(source):
+    chain, client = source
+    chain.gossip = blockchain.GossipRelay(chain, 'source:5000')
+    announcement = {'type': 'block', 'id': 'ab' * 32, 'index': 1, 'origin': 'attacker:5000'}
+    assert client.post('/nodes/register', json={'nodes': ['attacker:5000']}).status_code == 403
+    assert client.post('/gossip', json=announcement).status_code == 403
+    response = client.post('/gossip', json=announcement, headers={'X-Node-Token': TOKEN})
+    assert response.get_json() == {'accepted': False}
+    assert 'attacker:5000' not in chain.nodes